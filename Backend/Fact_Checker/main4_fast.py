@@ -3,12 +3,17 @@ import chromadb
 import pandas as pd 
 import sqlite3
 import os
+import sys
 import torch 
 import numpy as np
 import warnings
 import hashlib  # Used for unique ID generation
+import time
+import sentence_transformers
+from datetime import datetime, timedelta
 from difflib import SequenceMatcher 
 from sentence_transformers import SentenceTransformer, CrossEncoder
+from huggingface_hub import snapshot_download
 from chromadb.api.types import EmbeddingFunction, Documents, Embeddings
 
 warnings.filterwarnings("ignore")
@@ -16,14 +21,91 @@ warnings.filterwarnings("ignore")
 # Check for GPU
 device = "cuda" if torch.cuda.is_available() else "cpu"
 
+# Vector store lives next to main.py so the API and the pipeline worker share it
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+from body_store import has_column, get_bodies, body_hash
+from index_shards import (INDEX_RETENTION_WEEKS, parse_date, weekly_shard_name, shard_window,
+                          add_to_shards, apply_retention)
+from snapshot_format import write_snapshot, read_snapshot
+CHROMA_PATH = os.path.join(BACKEND_DIR, "chroma_db")
+# Pre-embedded corpus bulk-loaded into an empty index at startup (see index_snapshot.py)
+INDEX_SNAPSHOT_PATH = os.environ.get("INDEX_SNAPSHOT", os.path.join(BACKEND_DIR, "Database", "index_snapshot.npz"))
+
+EMBEDDING_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Hub commit (or branch/tag) of the embedding model; pin it so every replica embeds identically
+EMBEDDING_MODEL_REVISION = os.environ.get("EMBEDDING_MODEL_REVISION") or None
+VERIFIER_MODEL_NAME = 'cross-encoder/nli-deberta-v3-small'
+
+# --- TIME-SHARDED INDEX ---
+# Shard naming, placement and retention live in index_shards.py
+LEGACY_COLLECTION = "news_facts"
+CONFIDENT_SCORE = 0.75  # stop searching older shards once a True/False verdict is this confident
+RECENT_SHARDS_FIRST = 2   # shards searched before falling back to the rest of the index
+
 class CustomEmbeddingFunction(EmbeddingFunction):
     def __init__(self, model): 
         self.model = model
     def __call__(self, input: Documents) -> Embeddings: 
         return self.model.encode(input, device=device, convert_to_numpy=True).tolist()
 
+def load_models():
+    """Loads the embedding and NLI models. Called once in the pre-fork parent so workers share the weights."""
+    embedding_model = SentenceTransformer(EMBEDDING_MODEL_NAME, device=device, revision=EMBEDDING_MODEL_REVISION)
+    verifier = CrossEncoder(VERIFIER_MODEL_NAME, device=device)
+    if device == "cuda":
+        embedding_model.half()
+    return embedding_model, verifier
+
+# --- INDEX SNAPSHOTS ---
+# The file format lives in snapshot_format.py; these add the model and Chroma side.
+
+def embedding_model_revision():
+    """Commit hash of the embedding model files that load_models() uses, resolved from the
+    local Hugging Face cache without loading the model. None if it can't be determined."""
+    repo_id = EMBEDDING_MODEL_NAME if "/" in EMBEDDING_MODEL_NAME else f"sentence-transformers/{EMBEDDING_MODEL_NAME}"
+    try:
+        path = snapshot_download(repo_id, revision=EMBEDDING_MODEL_REVISION, local_files_only=True)
+    except Exception:
+        return None
+    return os.path.basename(os.path.normpath(path))
+
+def export_snapshot(out_path: str, half: bool = False):
+    """Writes every shard of the on-disk index to a snapshot file, stamped with the embedding
+    model's revision. Loads no models, but the model must be in the local cache."""
+    revision = embedding_model_revision()
+    if revision is None:
+        raise ValueError(f"Can't resolve the revision of {EMBEDDING_MODEL_NAME} from the local model cache")
+    client = chromadb.PersistentClient(path=CHROMA_PATH)
+    ids, vectors, documents, metadatas = [], [], [], []
+    for c in client.list_collections():
+        name = c if isinstance(c, str) else c.name
+        if shard_window(name) is None:
+            continue
+        data = client.get_collection(name=name).get(include=["embeddings", "documents", "metadatas"])
+        ids += data["ids"]
+        vectors += list(data["embeddings"])
+        documents += data["documents"]
+        metadatas += data["metadatas"]
+    if not ids:
+        raise ValueError(f"No indexed vectors found in {CHROMA_PATH}")
+
+    return write_snapshot(out_path, ids, vectors, documents, metadatas, {
+        "embeddingModel": EMBEDDING_MODEL_NAME,
+        "embeddingModelRevision": revision,
+        "sentenceTransformersVersion": sentence_transformers.__version__,
+    }, half=half)
+
+def limit_threads(num_threads: int):
+    """Caps torch intra-op threads so forked workers don't oversubscribe the cores."""
+    torch.set_num_threads(max(1, num_threads))
+
 class PIBFactChecker:
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, models=None, sync: bool = True, snapshot_path: str = INDEX_SNAPSHOT_PATH):
+        """``models`` reuses an already-loaded (embedding_model, verifier) pair. With ``sync=False``
+        the checker only reads the index and leaves embedding new articles to the pipeline worker.
+        When syncing into an empty index, ``snapshot_path`` is bulk-loaded first if it exists."""
 
         if db_path is None:
             # Get the directory of main4_fast.py (Backend/Fact_Checker)
@@ -35,83 +117,202 @@ class PIBFactChecker:
         print(f"🚀 Initializing CrisisTruthAI v2.1 (Device: {device})...")
         
         # Load Models
-        self.embedding_model = SentenceTransformer('all-MiniLM-L6-v2', device=device)
+        self.embedding_model, self.verifier = models or load_models()
         self.embedding_fn = CustomEmbeddingFunction(self.embedding_model)
-        self.verifier = CrossEncoder('cross-encoder/nli-deberta-v3-small', device=device)
-        
-        if device == "cuda":
-            self.embedding_model.half()
 
         # Initialize ChromaDB
-        self.client = chromadb.PersistentClient(path="./chroma_db")
-        self.collection = self.client.get_or_create_collection(
-            name="news_facts", 
-            embedding_function=self.embedding_fn
-        )
+        self.shard_latency = {}  # shard name -> (queries, total ms)
+        self.open_index()
         
         # Incremental Sync on Startup
+        if not sync:
+            return
+        since = None
+        if snapshot_path and os.path.exists(snapshot_path) and self.count() == 0:
+            since = self.load_snapshot(snapshot_path)
         if os.path.exists(db_path): 
-            self.sync_incremental(db_path)
+            self.sync_incremental(db_path, since=since)
         else:
             print(f"⚠️ Warning: Database file not found at {db_path}")
 
+    def open_index(self):
+        """(Re)opens the persistent Chroma client and loads handles for every time shard."""
+        self.client = chromadb.PersistentClient(path=CHROMA_PATH)
+        self.shards = {}
+        # list_collections returns names on some Chroma versions and Collection objects on others
+        names = [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+        for name in names:
+            if shard_window(name) is not None:
+                self.shards[name] = self.client.get_collection(name=name, embedding_function=self.embedding_fn)
+
+    def load_snapshot(self, path: str):
+        """Bulk-loads pre-computed vectors without running the model. Returns the snapshot's
+        sync watermark, or None if the snapshot was rejected."""
+        try:
+            manifest, data = read_snapshot(path, EMBEDDING_MODEL_NAME)
+        except (ValueError, OSError, KeyError) as e:
+            print(f"⚠️ Ignoring index snapshot {path}: {e}")
+            return None
+        dim = self.embedding_model.get_sentence_embedding_dimension()
+        if manifest["embeddingDim"] != dim:
+            print(f"⚠️ Ignoring index snapshot {path}: {manifest['embeddingDim']}-d vectors, model is {dim}-d")
+            return None
+        # Same name and size isn't enough: a retrained revision puts vectors in a different space
+        revision = embedding_model_revision()
+        if revision is None or manifest["embeddingModelRevision"] != revision:
+            print(f"⚠️ Ignoring index snapshot {path}: embedded with model revision "
+                  f"{manifest['embeddingModelRevision']}, this replica has {revision}")
+            return None
+        print(f"📦 Loading {manifest['count']} vectors from snapshot (watermark {manifest['watermark']})...")
+        self.add_to_shards(data["ids"], data["embeddings"], data["documents"], data["metadatas"])
+        return manifest["watermark"]
+
+    def reload_index(self):
+        """Drops the cached Chroma client so upserts made by another process become visible."""
+        chromadb.api.client.SharedSystemClient.clear_system_cache()
+        self.open_index()
+
+    def get_shard(self, name: str):
+        if name not in self.shards:
+            self.shards[name] = self.client.get_or_create_collection(name=name, embedding_function=self.embedding_fn)
+        return self.shards[name]
+
+    def shards_newest_first(self):
+        return sorted(self.shards, key=lambda name: shard_window(name)[0], reverse=True)
+
+    def migrate_legacy_collection(self):
+        """Moves vectors from the old single 'news_facts' collection into time shards, without re-embedding."""
+        names = [c if isinstance(c, str) else c.name for c in self.client.list_collections()]
+        if LEGACY_COLLECTION not in names:
+            return
+        legacy = self.client.get_collection(name=LEGACY_COLLECTION, embedding_function=self.embedding_fn)
+        print(f"🔄 Re-sharding {legacy.count()} vectors from legacy '{LEGACY_COLLECTION}' collection...")
+        data = legacy.get(include=["embeddings", "documents", "metadatas"])
+        self.add_to_shards(data["ids"], data["embeddings"], data["documents"], data["metadatas"])
+        self.client.delete_collection(name=LEGACY_COLLECTION)
+
+    def add_to_shards(self, ids, embeddings, documents, metadatas, shard_for=None):
+        """Copies already-embedded records into shards chosen by ``shard_for(date)`` (weekly by default)."""
+        add_to_shards(self.get_shard, ids, embeddings, documents, metadatas, shard_for=shard_for)
+
+    def apply_retention(self):
+        apply_retention(self.client, self.shards, self.get_shard)
+
     def generate_id(self, url: str):
         """Creates a stable, unique ID for an article based on its URL."""
         return hashlib.md5(url.encode()).hexdigest()
 
-    def sync_incremental(self, db_path: str):
-        """Syncs only the 'delta' (new records) from the latest 5000 in SQLite."""
+    def sync_incremental(self, db_path: str, since: str = None):
+        """Syncs only the 'delta' (new records) from the latest 5000 in SQLite, optionally
+        limited to rows scraped after the ``since`` watermark."""
+        self.migrate_legacy_collection()
         conn = sqlite3.connect(db_path)
         # Fetch latest 5000 items to ensure freshness
-        query = "SELECT url, title, summary, source, scraped_at FROM news ORDER BY scraped_at DESC LIMIT 5000"
-        df = pd.read_sql_query(query, conn)
-        conn.close()
+        columns = "url, title, summary, source, scraped_at"
+        split_bodies = has_column(conn, "news", "body_hash")
+        if split_bodies:
+            columns += ", body_hash"
+        if since:
+            query = f"SELECT {columns} FROM news WHERE scraped_at > ? ORDER BY scraped_at DESC LIMIT 5000"
+            df = pd.read_sql_query(query, conn, params=(since,))
+        else:
+            query = f"SELECT {columns} FROM news ORDER BY scraped_at DESC LIMIT 5000"
+            df = pd.read_sql_query(query, conn)
 
         if df.empty:
-            print("🛑 SQLite database is empty.")
+            conn.close()
+            print("✅ No articles newer than the snapshot." if since else "🛑 SQLite database is empty.")
+            self.apply_retention()
             return
 
         # Fetch IDs already existing in ChromaDB to avoid re-embedding
         # We only need the IDs, so we include=[] for speed
-        existing_ids = set(self.collection.get(include=[])['ids'])
-        
-        new_docs, new_metadatas, new_ids = [], [], []
-
-        for _, r in df.iterrows():
-            doc_id = self.generate_id(r['url'])
-            if doc_id not in existing_ids:
-                new_docs.append(f"{r['title']} | {r['summary'] or ''}")
-                new_metadatas.append({"source": str(r['source']), "date": str(r['scraped_at'])})
-                new_ids.append(doc_id)
-
-        if new_docs:
-            print(f"🔄 Found {len(new_docs)} new records. Embedding and syncing...")
-            batch_size = 500 
+        existing_ids = set()
+        for shard in self.shards.values():
+            existing_ids.update(shard.get(include=[])['ids'])
+        records = [r for r in df.to_dict('records') if self.generate_id(r['url']) not in existing_ids]
+
+        # Embed the full article text, not the excerpt kept in the news table
+        if split_bodies and records:
+            bodies = get_bodies(conn, [r['body_hash'] for r in records])
+            for r in records:
+                r['summary'] = bodies.get(r['body_hash'], r['summary'])
+        conn.close()
+
+        if records:
+            print(f"🔄 Found {len(records)} new records. Embedding and syncing...")
+            self.index_articles(records)
+            print(f"✅ Incremental sync complete. Total in vector store: {self.count()}")
+        else:
+            print(f"✅ Vector store is already up-to-date with the latest 5000 records.")
+        self.apply_retention()
+
+    def index_articles(self, records):
+        """Embeds and upserts article dicts with url, title, summary, source and scraped_at keys
+        into their weekly shard. Articles older than the retention window are skipped."""
+        retention_cutoff = datetime.now() - timedelta(weeks=INDEX_RETENTION_WEEKS)
+        by_shard = {}
+        for r in records:
+            scraped_at = parse_date(r['scraped_at'])
+            if scraped_at < retention_cutoff:
+                continue
+            docs, metas, ids = by_shard.setdefault(weekly_shard_name(scraped_at), ([], [], []))
+            docs.append(f"{r['title']} | {r['summary'] or ''}")
+            # Same hash as news.body_hash, so verdicts can point at the stored article instead of copying it
+            metas.append({"source": str(r['source']), "date": str(r['scraped_at']),
+                          "body_hash": body_hash(r['summary']) if r['summary'] else ""})
+            ids.append(self.generate_id(r['url']))
+
+        batch_size = 500 
+        for name, (new_docs, new_metadatas, new_ids) in by_shard.items():
+            shard = self.get_shard(name)
             for i in range(0, len(new_docs), batch_size):
                 end_idx = min(i + batch_size, len(new_docs))
-                self.collection.upsert(
+                shard.upsert(
                     documents=new_docs[i:end_idx], 
                     metadatas=new_metadatas[i:end_idx], 
                     ids=new_ids[i:end_idx]
                 )
-            print(f"✅ Incremental sync complete. Total in vector store: {self.collection.count()}")
-        else:
-            print(f"✅ Vector store is already up-to-date with the latest 5000 records.")
+
+    def count(self):
+        return sum(shard.count() for shard in self.shards.values())
+
+    def shard_stats(self):
+        """Per-shard size, approximate vector memory and query latency, newest shard first."""
+        dim = self.embedding_model.get_sentence_embedding_dimension()
+        stats = []
+        for name in self.shards_newest_first():
+            start, end = shard_window(name)
+            count = self.shards[name].count()
+            queries, total_ms = self.shard_latency.get(name, (0, 0.0))
+            stats.append({
+                "shard": name,
+                "from": start.date().isoformat(),
+                "to": end.date().isoformat(),
+                "vectors": count,
+                "approxVectorMB": round(count * dim * 4 / 1e6, 2),  # float32 payload, excludes HNSW graph
+                "queries": queries,
+                "avgQueryMs": round(total_ms / queries, 2) if queries else None
+            })
+        return stats
+
+    def warm_up(self):
+        """Runs one embedding, one cross-encoder pass and a query on the newest shards to
+        trigger lazy initialization (kernels, tokenizers, HNSW segments) before real traffic."""
+        text = "Government announces relief measures after floods"
+        self.embedding_model.encode([text], device=device)
+        self.verifier.predict([[text, text]])
+        for name in self.shards_newest_first()[:RECENT_SHARDS_FIRST]:
+            self.shards[name].query(query_texts=[text], n_results=1)
 
     def clean_text(self, text: str):
         for tag in [" - The Hindu", " - Times of India", "PTI", "ANI", " | "]:
             text = text.replace(tag, " ")
         return " ".join(text.split()).strip()
 
-    def verify_claim(self, claim: str):
-        search_results = self.collection.query(query_texts=[claim], n_results=5)
-        
-        if not search_results['documents'] or not search_results['documents'][0]:
-            return "Unverifiable", {"Neutral": 1.0}, "No matching records found.", "N/A"
-
-        full_evidence_raw = search_results['documents'][0][0]
-        meta = search_results['metadatas'][0][0]
-        clean_evidence = self.clean_text(full_evidence_raw)
+    def score_evidence(self, claim: str, evidence_raw: str):
+        """Returns NLI probabilities [contradiction, entailment, neutral] for one piece of evidence."""
+        clean_evidence = self.clean_text(evidence_raw)
         clean_claim = self.clean_text(claim)
 
         # Basic lexical similarity check
@@ -127,6 +328,42 @@ class PIBFactChecker:
         if is_literal_match or fuzzy_sim > 0.75:
             probs[1] = max(probs[1], 0.98)
             probs[2] = min(probs[2], 0.02)
+        return probs
+
+    def query_shard(self, name: str, query_embedding):
+        """Returns the shard's nearest hit as (distance, document, metadata), or None if it's empty."""
+        started = time.perf_counter()
+        results = self.shards[name].query(query_embeddings=[query_embedding], n_results=1,
+                                          include=["documents", "metadatas", "distances"])
+        queries, total_ms = self.shard_latency.get(name, (0, 0.0))
+        self.shard_latency[name] = (queries + 1, total_ms + (time.perf_counter() - started) * 1000)
+        if not results['documents'] or not results['documents'][0]:
+            return None
+        return results['distances'][0][0], results['documents'][0][0], results['metadatas'][0][0]
+
+    def verify_claim(self, claim: str):
+        # The verdict comes from the nearest document, as with a single collection. Recent
+        # shards are searched first since crisis claims are usually about recent events; the
+        # rest of the index is searched only when that match isn't decisive (True/False).
+        names = self.shards_newest_first()
+        query_embedding = self.embedding_fn([claim])[0]
+        hits, best = [], None
+        for tier in (names[:RECENT_SHARDS_FIRST], names[RECENT_SHARDS_FIRST:]):
+            if not tier:
+                break
+            hits += [hit for hit in (self.query_shard(name, query_embedding) for name in tier) if hit]
+            if not hits:
+                continue
+            nearest = min(hits, key=lambda hit: hit[0])
+            if best is None or nearest is not best[0]:
+                best = (nearest, self.score_evidence(claim, nearest[1]))
+            probs = best[1]
+            if max(probs[0], probs[1]) >= CONFIDENT_SCORE:
+                break
+
+        if best is None:
+            return "Unverifiable", {"Neutral": 1.0}, "No matching records found.", "N/A", None
+        (_, full_evidence_raw, meta), probs = best
 
         conf_dict = {
             "True (Match)": float(probs[1]),
@@ -144,28 +381,31 @@ class PIBFactChecker:
             verdict = "Unverifiable"
             reason = "Details are insufficient for a clear verdict."
 
-        return verdict, conf_dict, reason, full_evidence_raw
+        # The evidence article's news.body_hash (None for vectors indexed before it was recorded)
+        return verdict, conf_dict, reason, full_evidence_raw, meta.get("body_hash") or None
 
     def check_fact(self, user_input: str):
         if not user_input.strip():
             return "## ⚠️ Please enter a claim.", {}, {}
-        verdict, scores, reason, evidence = self.verify_claim(user_input)
+        verdict, scores, reason, evidence, _ = self.verify_claim(user_input)
         color = "#28a745" if verdict == "True" else "#dc3545" if verdict == "False" else "#ffc107"
         summary_md = f"## Verdict: <span style='color:{color}'>{verdict}</span>\n**Reasoning:** {reason}\n\n---\n**Evidence:**\n> {evidence}"
         return summary_md, scores, {"verdict": verdict, "source": reason}
 
 # Gradio Interface
-checker = PIBFactChecker()
-with gr.Blocks(theme=gr.themes.Soft(), title="CrisisTruthAI v2.1") as demo:
-    gr.Markdown("# 🛡️ CrisisTruthAI: Optimized Fact Checker")
-    with gr.Row():
-        with gr.Column(scale=1):
-            input_box = gr.Textbox(label="Paste Claim", placeholder="e.g., Global news events...", lines=5)
-            verify_btn = gr.Button("🔍 Verify", variant="primary")
-        with gr.Column(scale=1):
-            output_md = gr.Markdown(value="*Results will appear here...*")
-            conf_bar = gr.Label(label="Confidence Level")
-    verify_btn.click(checker.check_fact, inputs=input_box, outputs=[output_md, conf_bar])
+def build_demo(checker):
+    with gr.Blocks(theme=gr.themes.Soft(), title="CrisisTruthAI v2.1") as demo:
+        gr.Markdown("# 🛡️ CrisisTruthAI: Optimized Fact Checker")
+        with gr.Row():
+            with gr.Column(scale=1):
+                input_box = gr.Textbox(label="Paste Claim", placeholder="e.g., Global news events...", lines=5)
+                verify_btn = gr.Button("🔍 Verify", variant="primary")
+            with gr.Column(scale=1):
+                output_md = gr.Markdown(value="*Results will appear here...*")
+                conf_bar = gr.Label(label="Confidence Level")
+        verify_btn.click(checker.check_fact, inputs=input_box, outputs=[output_md, conf_bar])
+    return demo
 
 if __name__ == "__main__":
-    demo.launch()
\ No newline at end of file
+    # Only the standalone demo loads models at import; main.py and the worker build their own checker
+    build_demo(PIBFactChecker()).launch()
\ No newline at end of file
@@ -40,6 +40,10 @@ BACKEND_ROOT = os.path.dirname(CURRENT_DIR)              # Backend/
 DB_PATH = os.path.join(BACKEND_ROOT, "Database", "fake_news_2.db")
 NEWS_DB_PATH = os.path.join(BACKEND_ROOT, "Database", "news_articles.db")
 
+if BACKEND_ROOT not in sys.path:
+    sys.path.insert(0, BACKEND_ROOT)
+from body_store import init_bodies, ensure_column, excerpt
+
 def get_dynamic_metadata(title: str):
     """Categorizes the claim and assigns a random impact level."""
     title_lower = title.lower()
@@ -77,6 +81,10 @@ def init_db():
                       impact TEXT,
                       real_evidence TEXT,
                       verdict_score REAL)''')
+    # real_evidence keeps an excerpt; evidence_hash points at the evidence article's body in
+    # news_articles.db (or, for rows converted by migrate_bodies.py, at this database's `bodies`)
+    ensure_column(conn, "fake_claims", "evidence_hash")
+    init_bodies(conn)
     conn.commit()
     conn.close()
 
@@ -150,15 +158,18 @@ def scrape_bbc_disinformation():
         print(f"BBC Error: {e}")
     conn.close()
 
-def verify_with_pib_checker(limit=50):
-    """The new AI verification logic applied to all gathered sources."""
-    print(f"🛡️ Initializing PIBFactChecker for AI Cross-Verification...")
-    
-    try:
-        checker = PIBFactChecker(db_path=NEWS_DB_PATH)
-    except Exception as e:
-        print(f"❌ Failed to initialize Fact Checker: {e}")
-        return
+def verify_with_pib_checker(limit=50, checker=None):
+    """The new AI verification logic applied to all gathered sources.
+
+    Pass an already-loaded ``checker`` to reuse its models instead of loading a fresh copy.
+    """
+    if checker is None:
+        print(f"🛡️ Initializing PIBFactChecker for AI Cross-Verification...")
+        try:
+            checker = PIBFactChecker(db_path=NEWS_DB_PATH)
+        except Exception as e:
+            print(f"❌ Failed to initialize Fact Checker: {e}")
+            return
 
     conn = sqlite3.connect(DB_PATH)
     cursor = conn.cursor()
@@ -170,20 +181,22 @@ def verify_with_pib_checker(limit=50):
     rows = cursor.fetchall()
     
     if not rows:
+        conn.close()
         print("✅ No new claims to verify.")
         return
 
     for row_id, claim in tqdm(rows, desc="AI Verifying"):
-        verdict, conf_dict, reason, full_evidence = checker.verify_claim(claim)
+        verdict, conf_dict, reason, full_evidence, evidence_hash = checker.verify_claim(claim)
         max_score = max(conf_dict.values()) if conf_dict else 0
         if(verdict == 'Unverifiable'):
             verdict = 'Most likely False'
         cursor.execute("""UPDATE fake_claims 
                           SET real_evidence = ?, 
+                              evidence_hash = ?,
                               label = ?, 
                               verdict_score = ?
                           WHERE id = ?""", 
-                       (full_evidence, verdict, max_score, row_id))
+                       (excerpt(full_evidence), evidence_hash, verdict, max_score, row_id))
     
     conn.commit()
     conn.close()
@@ -17,6 +17,10 @@ TOTAL_MAX_WORKERS = 20
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "Database", "news_articles.db")
 
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from body_store import init_bodies, ensure_column, put_body, body_hash, excerpt
+
 # DB_PATH = r'C:\Users\Badhri Prasath D R\Desktop\Escape Hackathon Trial\Backend\Database\news_articles.db'
 LOG_FILE = "scraper_debug.log"
 
@@ -52,6 +56,9 @@ def init_db():
             cluster_id TEXT, source TEXT, title TEXT, 
             url TEXT UNIQUE, summary TEXT, image_url TEXT, scraped_at TIMESTAMP
         )''')
+    # Full article text lives compressed in `bodies`; `summary` keeps a short excerpt
+    ensure_column(conn, "news", "body_hash")
+    init_bodies(conn)
     conn.commit()
     conn.close()
 
@@ -106,6 +113,36 @@ def process_article(name, item, existing_urls):
         return (None, name, title, url, content, image_url, datetime.now())
     return None
 
+def fetch_feed_items(source):
+    """Returns (source_name, item) pairs for the newest entries of one RSS feed."""
+    try:
+        # Short timeout to keep the "link gathering" phase fast
+        resp = requests.get(source['rss_url'], headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
+        items = BeautifulSoup(resp.content, 'xml').find_all('item')[:MAX_ARTICLES_PER_SOURCE]
+        return [(source['name'], item) for item in items]
+    except Exception as e:
+        logging.error(f"Could not load RSS for {source['name']}")
+        return []
+
+def save_articles(batch_data):
+    """Inserts rows produced by process_article, skipping URLs already stored.
+    The article text goes to the `bodies` table; the news row keeps an excerpt and its hash."""
+    if not batch_data:
+        return
+    with db_lock:
+        conn = sqlite3.connect(DB_PATH)
+        for cluster_id, name, title, url, content, image_url, scraped_at in batch_data:
+            cur = conn.execute("""INSERT OR IGNORE INTO news
+                                  (cluster_id, source, title, url, summary, image_url, scraped_at, body_hash)
+                                  VALUES (?,?,?,?,?,?,?,?)""",
+                               (cluster_id, name, title, url, excerpt(content), image_url, scraped_at,
+                                body_hash(content) if content else None))
+            # Store the body only for new rows, so duplicate URLs don't leave orphan bodies
+            if cur.rowcount == 1:
+                put_body(conn, content)
+        conn.commit()
+        conn.close()
+
 def scrape_all_sources(sources):
     init_db()
     existing_urls = get_existing_urls()
@@ -114,14 +151,7 @@ def scrape_all_sources(sources):
     logging.info(f"🚀 Starting scrape for {len(sources)} sources...")
     
     for source in sources:
-        try:
-            # Short timeout to keep the "link gathering" phase fast
-            resp = requests.get(source['rss_url'], headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
-            items = BeautifulSoup(resp.content, 'xml').find_all('item')[:MAX_ARTICLES_PER_SOURCE]
-            for item in items:
-                all_tasks.append((source['name'], item))
-        except Exception as e:
-            logging.error(f"Could not load RSS for {source['name']}")
+        all_tasks.extend(fetch_feed_items(source))
 
     batch_data = []
     duplicates_found = 0
@@ -140,12 +170,7 @@ def scrape_all_sources(sources):
             else:
                 errors += 1
 
-    if batch_data:
-        with db_lock:
-            conn = sqlite3.connect(DB_PATH)
-            conn.executemany("INSERT OR IGNORE INTO news VALUES (NULL, ?,?,?,?,?,?,?)", batch_data)
-            conn.commit()
-            conn.close()
+    save_articles(batch_data)
     
     print("\n" + "="*35)
     print(f"✅ New Articles:      {len(batch_data)}")
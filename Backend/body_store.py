@@ -0,0 +1,58 @@
+"""Content-addressed, compressed storage for long texts (article bodies, evidence).
+
+Bodies live in a ``bodies`` table keyed by the SHA-256 of their text, so identical texts
+are stored once. Hot tables keep only a short excerpt plus the hash, which keeps the rows
+touched by list/sort queries small.
+"""
+import hashlib
+import zlib
+
+EXCERPT_CHARS = 300   # enough for every excerpt the API shows (200 chars max)
+ZLIB_LEVEL = 6
+
+def init_bodies(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS bodies (
+            hash TEXT PRIMARY KEY, codec TEXT, size INTEGER, data BLOB
+        )''')
+
+def has_column(conn, table: str, column: str):
+    return any(row[1] == column for row in conn.execute(f"PRAGMA table_info({table})"))
+
+def ensure_column(conn, table: str, column: str):
+    """Adds a TEXT column to an existing table if it isn't there yet."""
+    if not has_column(conn, table, column):
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+
+def excerpt(text):
+    return text[:EXCERPT_CHARS] if text else text
+
+def body_hash(text: str):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def put_body(conn, text):
+    """Stores ``text`` once and returns its hash (None for empty text). Caller commits."""
+    if not text:
+        return None
+    raw = text.encode("utf-8")
+    digest = body_hash(text)
+    conn.execute("INSERT OR IGNORE INTO bodies (hash, codec, size, data) VALUES (?, 'zlib', ?, ?)",
+                 (digest, len(raw), zlib.compress(raw, ZLIB_LEVEL)))
+    return digest
+
+def get_bodies(conn, hashes):
+    """Returns {hash: text} for the given hashes; missing hashes are left out."""
+    hashes = [h for h in set(hashes) if isinstance(h, str)]
+    found = {}
+    # Chunked to stay under SQLite's bound-parameter limit
+    for i in range(0, len(hashes), 500):
+        chunk = hashes[i:i + 500]
+        placeholders = ",".join("?" * len(chunk))
+        rows = conn.execute(f"SELECT hash, codec, data FROM bodies WHERE hash IN ({placeholders})", chunk).fetchall()
+        found.update({h: _decode(codec, data) for h, codec, data in rows})
+    return found
+
+def _decode(codec: str, data: bytes):
+    if codec == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    raise ValueError(f"Unknown body codec {codec}")
@@ -0,0 +1,86 @@
+"""Time sharding for the vector index: shard names, windows, placement and retention.
+
+Vectors live in one collection per ISO week (news_w_YYYY_WW); weeks older than
+COMPACT_AFTER_WEEKS are merged into monthly shards (news_m_YYYY_MM) and anything
+older than INDEX_RETENTION_WEEKS is dropped. Works on any Chroma-like client and
+collections, so it imports no models.
+"""
+import os
+from datetime import datetime, timedelta
+
+WEEKLY_PREFIX = "news_w_"
+MONTHLY_PREFIX = "news_m_"
+INDEX_RETENTION_WEEKS = int(os.environ.get("INDEX_RETENTION_WEEKS", 26))
+COMPACT_AFTER_WEEKS = int(os.environ.get("INDEX_COMPACT_AFTER_WEEKS", 8))
+UPSERT_BATCH_SIZE = 500
+
+def parse_date(value):
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return datetime.now()
+
+def weekly_shard_name(date: datetime):
+    year, week, _ = date.isocalendar()
+    return f"{WEEKLY_PREFIX}{year}_{week:02d}"
+
+def monthly_shard_name(date: datetime):
+    return f"{MONTHLY_PREFIX}{date.year}_{date.month:02d}"
+
+def shard_window(name: str):
+    """Returns the (start, end) datetimes covered by a shard, or None if it isn't a shard."""
+    try:
+        if name.startswith(WEEKLY_PREFIX):
+            year, week = map(int, name[len(WEEKLY_PREFIX):].split("_"))
+            start = datetime.fromisocalendar(year, week, 1)
+            return start, start + timedelta(weeks=1)
+        if name.startswith(MONTHLY_PREFIX):
+            year, month = map(int, name[len(MONTHLY_PREFIX):].split("_"))
+            start = datetime(year, month, 1)
+            return start, datetime(year + month // 12, month % 12 + 1, 1)
+    except ValueError:
+        pass
+    return None
+
+def add_to_shards(get_shard, ids, embeddings, documents, metadatas, shard_for=None):
+    """Copies already-embedded records into the shards returned by ``get_shard(name)``,
+    chosen by ``shard_for(date)`` (weekly by default)."""
+    shard_for = shard_for or weekly_shard_name
+    grouped = {}
+    for i, meta in enumerate(metadatas):
+        grouped.setdefault(shard_for(parse_date(meta.get("date"))), []).append(i)
+    for name, idxs in grouped.items():
+        shard = get_shard(name)
+        for i in range(0, len(idxs), UPSERT_BATCH_SIZE):
+            chunk = idxs[i:i + UPSERT_BATCH_SIZE]
+            shard.upsert(
+                ids=[ids[j] for j in chunk],
+                embeddings=[embeddings[j] for j in chunk],
+                documents=[documents[j] for j in chunk],
+                metadatas=[metadatas[j] for j in chunk]
+            )
+
+def apply_retention(client, shards, get_shard, now=None):
+    """Drops shards past INDEX_RETENTION_WEEKS and folds weekly shards older than
+    COMPACT_AFTER_WEEKS into monthly ones, so old news costs fewer, larger collections.
+    ``shards`` maps shard names to open collections and is updated in place."""
+    now = now or datetime.now()
+    retention_cutoff = now - timedelta(weeks=INDEX_RETENTION_WEEKS)
+    compact_cutoff = now - timedelta(weeks=COMPACT_AFTER_WEEKS)
+
+    for name in list(shards):
+        start, end = shard_window(name)
+        if end <= retention_cutoff:
+            print(f"🗑️ Dropping expired shard {name}")
+            client.delete_collection(name=name)
+            del shards[name]
+        elif name.startswith(WEEKLY_PREFIX) and end <= compact_cutoff:
+            print(f"🗜️ Compacting {name} into monthly shards")
+            data = shards[name].get(include=["embeddings", "documents", "metadatas"])
+            # Place each article by its own date, so a week spanning two months is split and
+            # no article expires with an older month. Missing/odd dates go with the week's start.
+            add_to_shards(get_shard, data["ids"], data["embeddings"], data["documents"], data["metadatas"],
+                          shard_for=lambda date, start=start, end=end:
+                              monthly_shard_name(date if start <= date < end else start))
+            client.delete_collection(name=name)
+            del shards[name]
@@ -0,0 +1,38 @@
+"""Export / inspect portable vector index snapshots.
+
+    python index_snapshot.py export [--out PATH] [--half]
+    python index_snapshot.py inspect [PATH]
+
+A new replica that finds the snapshot at INDEX_SNAPSHOT (default Database/index_snapshot.npz)
+bulk-loads it into its empty index at startup, then embeds only articles newer than the
+snapshot's watermark instead of re-embedding the whole corpus.
+"""
+import argparse
+import json
+import os
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from Fact_Checker.main4_fast import INDEX_SNAPSHOT_PATH, EMBEDDING_MODEL_NAME, export_snapshot
+from snapshot_format import read_snapshot
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CrisisTruth vector index snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export_cmd = sub.add_parser("export", help="write the current index to a snapshot file")
+    export_cmd.add_argument("--out", default=INDEX_SNAPSHOT_PATH)
+    export_cmd.add_argument("--half", action="store_true", help="store vectors as float16 (half the size)")
+    inspect_cmd = sub.add_parser("inspect", help="verify a snapshot's checksum and print its manifest")
+    inspect_cmd.add_argument("path", nargs="?", default=INDEX_SNAPSHOT_PATH)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        manifest = export_snapshot(args.out, half=args.half)
+        size_mb = os.path.getsize(args.out) / 1e6
+        print(f"✅ Exported {manifest['count']} vectors to {args.out} ({size_mb:.1f} MB)")
+    else:
+        manifest, _ = read_snapshot(args.path, EMBEDDING_MODEL_NAME)
+        print(json.dumps(manifest, indent=2))
@@ -0,0 +1,303 @@
+"""SQLite-backed job queue for the pipeline worker.
+
+Pure SQLite so the API can read run status without importing the scrapers or models.
+At most one job is queued or running at a time, which is what keeps runs from overlapping.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock, a single worker is up to the deployment
+    fcntl = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Runtime state, kept out of Database/ (shipped in the image) and ignored by git and docker
+JOBS_DB_PATH = os.environ.get("PIPELINE_JOBS_DB", os.path.join(BASE_DIR, "var", "pipeline_jobs.db"))
+PROGRESS_FLUSH_SECONDS = 1.0
+WORKER_HEARTBEAT_TIMEOUT = 60  # seconds without a heartbeat before the worker counts as dead
+
+def _connect():
+    conn = sqlite3.connect(JOBS_DB_PATH, timeout=20)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def init_jobs_db():
+    os.makedirs(os.path.dirname(JOBS_DB_PATH), exist_ok=True)
+    conn = _connect()
+    conn.execute('PRAGMA journal_mode=WAL;')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            reason TEXT, status TEXT, stage TEXT, progress TEXT, error TEXT,
+            created_at TIMESTAMP, started_at TIMESTAMP, updated_at TIMESTAMP, finished_at TIMESTAMP
+        )''')
+    # Single row describing the current pipeline worker process
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS worker_status (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            pid INTEGER, started_at TIMESTAMP, heartbeat_at TIMESTAMP,
+            exited_at TIMESTAMP, exit_code INTEGER, exits INTEGER DEFAULT 0
+        )''')
+    conn.commit()
+    conn.close()
+
+def enqueue_job(reason="manual"):
+    """Queues a pipeline run. Returns the new job id, or None if a run is already queued or running."""
+    init_jobs_db()
+    conn = _connect()
+    try:
+        # BEGIN IMMEDIATE takes the write lock so two callers can't both see "no active job"
+        conn.execute("BEGIN IMMEDIATE")
+        active = conn.execute("SELECT id FROM jobs WHERE status IN ('queued', 'running')").fetchone()
+        if active:
+            conn.rollback()
+            return None
+        now = datetime.now()
+        cur = conn.execute(
+            "INSERT INTO jobs (reason, status, progress, created_at, updated_at) VALUES (?, 'queued', '{}', ?, ?)",
+            (reason, now, now))
+        conn.commit()
+        return cur.lastrowid
+    finally:
+        conn.close()
+
+def start_startup_sync():
+    """Records the worker's startup index sync as a running job and returns its id. Unlike
+    enqueue_job this never waits behind a queued run: readiness depends on seeing it finish."""
+    init_jobs_db()
+    now = datetime.now()
+    conn = _connect()
+    cur = conn.execute(
+        "INSERT INTO jobs (reason, status, progress, created_at, started_at, updated_at) "
+        "VALUES ('startup-sync', 'running', '{}', ?, ?, ?)", (now, now, now))
+    conn.commit()
+    conn.close()
+    return cur.lastrowid
+
+def claim_next_job():
+    """Marks the oldest queued job as running and returns its id (None if the queue is empty)."""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        now = datetime.now()
+        conn.execute("UPDATE jobs SET status = 'running', started_at = ?, updated_at = ? WHERE id = ?",
+                     (now, now, row["id"]))
+        conn.commit()
+        return row["id"]
+    finally:
+        conn.close()
+
+def finish_job(job_id, status, error=None):
+    conn = _connect()
+    now = datetime.now()
+    conn.execute("UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                 (status, error, now, now, job_id))
+    conn.commit()
+    conn.close()
+
+def acquire_worker_lock():
+    """Takes the exclusive pipeline worker lock (a file next to JOBS_DB_PATH). Returns the
+    open lock file, which must stay open while the worker runs, or None if another worker
+    holds it. The OS drops the lock when the holder exits, however it exits."""
+    os.makedirs(os.path.dirname(JOBS_DB_PATH), exist_ok=True)
+    lock_file = open(JOBS_DB_PATH + ".lock", "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+def fail_interrupted_jobs():
+    """Fails every 'running' job. Only the pipeline worker holding the worker lock claims
+    jobs, so when it starts, any job still marked running was cut off by a crash, restart
+    or redeploy."""
+    now = datetime.now()
+    conn = _connect()
+    cur = conn.execute(
+        "UPDATE jobs SET status = 'failed', error = 'interrupted: pipeline worker restarted', "
+        "updated_at = ?, finished_at = ? WHERE status = 'running'", (now, now))
+    conn.commit()
+    conn.close()
+    if cur.rowcount:
+        print(f"⚠️ Marked {cur.rowcount} interrupted pipeline job(s) as failed.")
+    return cur.rowcount
+
+def last_job_created_at():
+    """Creation time of the newest scrape run (startup syncs don't count towards the schedule)."""
+    conn = _connect()
+    row = conn.execute("SELECT created_at FROM jobs WHERE reason != 'startup-sync' ORDER BY id DESC LIMIT 1").fetchone()
+    conn.close()
+    return datetime.fromisoformat(row["created_at"]) if row else None
+
+def last_completed_job_id():
+    """Id of the newest successful run; the API uses it to notice fresh vectors."""
+    if not os.path.exists(JOBS_DB_PATH):
+        return None
+    conn = _connect()
+    row = conn.execute("SELECT MAX(id) FROM jobs WHERE status = 'done'").fetchone()
+    conn.close()
+    return row[0]
+
+def current_worker_synced():
+    """True once the running pipeline worker has finished its own startup sync: a 'done'
+    startup-sync created after that worker registered, while it is still heartbeating.
+    Jobs left over from earlier workers, or in a copied database, don't count."""
+    worker = get_worker_status()
+    if worker is None or not worker["alive"]:
+        return False
+    conn = _connect()
+    row = conn.execute(
+        "SELECT 1 FROM jobs WHERE reason = 'startup-sync' AND status = 'done' AND created_at >= ? LIMIT 1",
+        (worker["startedAt"],)).fetchone()
+    conn.close()
+    return row is not None
+
+def get_pipeline_status(limit=5):
+    """Returns the most recent jobs with their per-stage progress counters."""
+    if not os.path.exists(JOBS_DB_PATH):
+        return []
+    conn = _connect()
+    rows = conn.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    conn.close()
+    return [{
+        "id": r["id"],
+        "reason": r["reason"],
+        "status": r["status"],
+        "stage": r["stage"],
+        "progress": json.loads(r["progress"] or "{}"),
+        "error": r["error"],
+        "createdAt": r["created_at"],
+        "startedAt": r["started_at"],
+        "finishedAt": r["finished_at"],
+    } for r in rows]
+
+def startup_sync_failure(since: datetime):
+    """Why the index can't become ready, or None while it still might: the newest startup
+    sync created after ``since`` failed, or the pipeline worker has exited since then."""
+    if not os.path.exists(JOBS_DB_PATH):
+        return None
+    conn = _connect()
+    try:
+        job = conn.execute(
+            "SELECT status, error, created_at FROM jobs WHERE reason = 'startup-sync' ORDER BY id DESC LIMIT 1"
+        ).fetchone()
+        worker = conn.execute("SELECT pid, exited_at, exit_code FROM worker_status WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None  # tables not created yet
+    finally:
+        conn.close()
+    if job and job["status"] == "failed" and datetime.fromisoformat(job["created_at"]) >= since:
+        return f"pipeline worker startup sync failed: {job['error']}"
+    if worker and worker["exited_at"] and datetime.fromisoformat(worker["exited_at"]) >= since:
+        return f"pipeline worker {worker['pid']} exited with code {worker['exit_code']} before the index was synced"
+    return None
+
+# --- WORKER STATUS ---
+
+def register_worker(pid):
+    """Called by the pipeline worker on startup."""
+    now = datetime.now()
+    conn = _connect()
+    conn.execute(
+        "INSERT INTO worker_status (id, pid, started_at, heartbeat_at) VALUES (1, ?, ?, ?) "
+        "ON CONFLICT(id) DO UPDATE SET pid = excluded.pid, started_at = excluded.started_at, "
+        "heartbeat_at = excluded.heartbeat_at, exited_at = NULL, exit_code = NULL",
+        (pid, now, now))
+    conn.commit()
+    conn.close()
+
+def worker_heartbeat(pid):
+    conn = _connect()
+    conn.execute("UPDATE worker_status SET heartbeat_at = ? WHERE id = 1 AND pid = ?", (datetime.now(), pid))
+    conn.commit()
+    conn.close()
+
+def record_worker_exit(pid, exit_code):
+    """Called by whichever process supervises the worker when it exits. Ignored while a
+    different worker is registered and heartbeating: the exit is then a standby that lost
+    the worker lock, not the worker everyone depends on."""
+    init_jobs_db()
+    now = datetime.now()
+    stale = now - timedelta(seconds=WORKER_HEARTBEAT_TIMEOUT)
+    conn = _connect()
+    conn.execute(
+        "INSERT INTO worker_status (id, pid, exited_at, exit_code, exits) VALUES (1, ?, ?, ?, 1) "
+        "ON CONFLICT(id) DO UPDATE SET pid = excluded.pid, exited_at = excluded.exited_at, "
+        "exit_code = excluded.exit_code, exits = exits + 1 "
+        "WHERE worker_status.pid = excluded.pid OR worker_status.exited_at IS NOT NULL "
+        "OR worker_status.heartbeat_at IS NULL OR worker_status.heartbeat_at < ?",
+        (pid, now, exit_code, stale))
+    conn.commit()
+    conn.close()
+
+def get_worker_status():
+    """Returns the pipeline worker's pid, heartbeat and last exit, or None if it never ran."""
+    if not os.path.exists(JOBS_DB_PATH):
+        return None
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM worker_status WHERE id = 1").fetchone()
+    except sqlite3.OperationalError:
+        row = None  # database created before worker_status existed
+    conn.close()
+    if row is None:
+        return None
+    heartbeat = datetime.fromisoformat(row["heartbeat_at"]) if row["heartbeat_at"] else None
+    alive = (row["exited_at"] is None and heartbeat is not None
+             and (datetime.now() - heartbeat).total_seconds() < WORKER_HEARTBEAT_TIMEOUT)
+    return {
+        "pid": row["pid"],
+        "alive": alive,
+        "startedAt": row["started_at"],
+        "heartbeatAt": row["heartbeat_at"],
+        "exitedAt": row["exited_at"],
+        "exitCode": row["exit_code"],
+        "exits": row["exits"],
+    }
+
+# --- PROGRESS ---
+
+class StageProgress:
+    """Thread-safe per-stage counters, flushed to the job row at most once per second."""
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.counts = {}
+        self.stage = None
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+
+    def set_stage(self, stage):
+        with self.lock:
+            self.stage = stage
+        self.flush(force=True)
+
+    def bump(self, stage, key, n=1):
+        with self.lock:
+            stage_counts = self.counts.setdefault(stage, {})
+            stage_counts[key] = stage_counts.get(key, 0) + n
+        self.flush()
+
+    def flush(self, force=False):
+        with self.lock:
+            if not force and time.monotonic() - self.last_flush < PROGRESS_FLUSH_SECONDS:
+                return
+            self.last_flush = time.monotonic()
+            stage, progress = self.stage, json.dumps(self.counts)
+        conn = _connect()
+        conn.execute("UPDATE jobs SET stage = ?, progress = ?, updated_at = ? WHERE id = ?",
+                     (stage, progress, datetime.now(), self.job_id))
+        conn.commit()
+        conn.close()
@@ -4,13 +4,19 @@ from contextlib import asynccontextmanager
 from pydantic import BaseModel
 import sqlite3
 import os
+import sys
 import random
+import subprocess
+import threading
+import time
+from datetime import datetime
 
 # Import your custom modules
-from Fact_Checker.main4_fast import PIBFactChecker
-from News_Scraper.news_scraper_AI2 import scrape_all_sources, SOURCE_CONFIG
-from News_Scraper.fake_news_scraper2 import scrape_politifact, scrape_bbc_disinformation, verify_with_pib_checker
-from apscheduler.schedulers.background import BackgroundScheduler
+from Fact_Checker.main4_fast import PIBFactChecker, load_models, limit_threads, device
+from job_queue import (get_pipeline_status, last_completed_job_id, get_worker_status, record_worker_exit,
+                       startup_sync_failure, current_worker_synced)
+from prefork import process_memory_report, serve_prefork, RestartBackoff
+from body_store import get_bodies
 
 # --- CONFIGURATION ---
 # DB_PATH = r"C:\Users\Badhri Prasath D R\Desktop\Escape Hackathon Trial\Backend\Database\news_articles.db"
@@ -20,7 +26,30 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DB_PATH = os.path.join(BASE_DIR, "Database", "news_articles.db")
 FAKE_DB_PATH = os.path.join(BASE_DIR, "Database", "fake_news_2.db")
 
+# Set PIPELINE_WORKER=external when the worker is run as its own container/service
+RUN_PIPELINE_WORKER = os.environ.get("PIPELINE_WORKER", "spawn") == "spawn"
+# More than 1 pre-forks API workers that share one copy of the model weights
+WEB_CONCURRENCY = int(os.environ.get("WEB_CONCURRENCY", 1))
+
 checker = None
+preloaded_models = None  # (embedding_model, verifier) loaded by the pre-fork parent
+indexed_job_id = None  # last pipeline job whose vectors this process has loaded
+INDEX_POLL_SECONDS = 2
+# A fresh replica may need to embed thousands of articles before its first sync completes
+INDEX_WAIT_TIMEOUT_MINUTES = float(os.environ.get("INDEX_WAIT_TIMEOUT_MINUTES", 30))
+STARTED_AT = datetime.now()
+
+# Progress of the background warm-up, reported by /healthz and /readyz
+startup_state = {
+    "stage": "starting",
+    "modelsLoaded": False,
+    "indexSynced": False,
+    "warmedUp": False,
+    "ready": False,
+    "error": None,
+    "startedAt": STARTED_AT.isoformat(),
+    "readyAt": None,
+}
 
 class ClaimRequest(BaseModel):
     claim: str
@@ -28,18 +57,97 @@ class ClaimRequest(BaseModel):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("🚀 CrisisTruth AI Backend Starting Up...")
+    # Start the pipeline worker first: its startup sync is what the warm-up waits for
+    supervisor = PipelineSupervisor().start() if RUN_PIPELINE_WORKER else None
+    # Models load in the background so the SQLite-backed endpoints serve immediately
+    threading.Thread(target=warm_up_checker, name="warm-up", daemon=True).start()
+    yield 
+    if supervisor is not None:
+        supervisor.stop()
+
+def warm_up_checker():
+    """Loads the models, waits for the pipeline worker's first index sync, then runs one
+    inference so lazy initialization happens before /readyz reports ready."""
     global checker
     try:
-        checker = PIBFactChecker()
+        startup_state["stage"] = "loading-models"
+        # Read-only: the pipeline worker is the single writer that keeps the index in sync
+        loaded = PIBFactChecker(models=preloaded_models, sync=False)
+        startup_state["modelsLoaded"] = True
+
+        startup_state["stage"] = "waiting-for-index"
+        deadline = time.monotonic() + INDEX_WAIT_TIMEOUT_MINUTES * 60
+        # Wait for this worker's own sync: a finished job alone may come from an old or copied jobs DB
+        while not current_worker_synced():
+            # Fail instead of waiting forever, so /healthz goes red and the instance is restarted
+            failure = startup_sync_failure(STARTED_AT)
+            if failure:
+                raise RuntimeError(failure)
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"index not synced after {INDEX_WAIT_TIMEOUT_MINUTES:g} minutes")
+            time.sleep(INDEX_POLL_SECONDS)
+        checker = loaded
+        refresh_index_if_stale()
+        startup_state["indexSynced"] = True
+
+        startup_state["stage"] = "warming-up"
+        checker.warm_up()
+        startup_state["warmedUp"] = True
+
+        startup_state.update(stage="ready", ready=True, readyAt=datetime.now().isoformat())
+        print("✅ Fact Checker warmed up and ready.")
     except Exception as e:
+        startup_state.update(stage="failed", error=str(e))
         print(f"❌ Failed to initialize FactChecker: {e}")
-    
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(automated_scraping, 'interval', hours=2)
-    scheduler.start()
-    yield 
-    print("🛑 Shutting down scheduler...")
-    scheduler.shutdown()
+
+def start_pipeline_worker():
+    """Scraping, verification and embedding run in a separate process so they never
+    compete with /verify for the API's CPU and GIL."""
+    return subprocess.Popen([sys.executable, os.path.join(BASE_DIR, "pipeline_worker.py")], cwd=BASE_DIR)
+
+class PipelineSupervisor:
+    """Keeps the pipeline worker running, restarting it with backoff whenever it exits.
+    Each exit is recorded in the job database so /pipeline-status and /readyz can report it."""
+
+    def __init__(self):
+        self.proc = None
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.backoff = RestartBackoff()
+        self.thread = threading.Thread(target=self._run, name="pipeline-supervisor", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def _run(self):
+        while True:
+            with self.lock:
+                if self.stopped.is_set():
+                    return
+                self.proc = start_pipeline_worker()
+            started = time.monotonic()
+            code = self.proc.wait()
+            if self.stopped.is_set():
+                return
+            record_worker_exit(self.proc.pid, code)
+            delay = self.backoff.next_delay(time.monotonic() - started)
+            print(f"⚠️ Pipeline worker {self.proc.pid} exited ({code}); restarting in {delay:.0f}s...")
+            self.stopped.wait(delay)
+
+    def stop(self):
+        with self.lock:
+            self.stopped.set()
+            proc = self.proc
+        if proc is not None and proc.poll() is None:
+            print("🛑 Shutting down pipeline worker...")
+            proc.terminate()
+            proc.wait(timeout=30)
+
+def preload_for_prefork():
+    """Runs once in the pre-fork parent; API workers inherit these globals through fork."""
+    global preloaded_models
+    preloaded_models = load_models()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -73,9 +181,10 @@ def get_dynamic_metadata(title: str, source: str):
 
 @app.post("/verify")
 async def verify_claim(request: ClaimRequest):
-    if checker is None:
-        raise HTTPException(status_code=503, detail="Fact Checker model is still loading.")
+    if not startup_state["ready"]:
+        raise HTTPException(status_code=503, detail=f"Fact Checker is still starting ({startup_state['stage']}).")
     try:
+        refresh_index_if_stale()
         summary, scores, meta = checker.check_fact(request.claim)
         
         # FIX: Ensure judges don't see "Unverifiable"
@@ -124,6 +233,21 @@ async def get_real_news():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def get_news_bodies(hashes):
+    if not os.path.exists(DB_PATH):
+        return {}
+    conn = sqlite3.connect(DB_PATH, timeout=20)
+    try:
+        return get_bodies(conn, hashes)
+    except sqlite3.OperationalError:
+        return {}  # news database not migrated to the bodies table yet
+    finally:
+        conn.close()
+
+def evidence_text(row, evidence):
+    text = (evidence.get(row["evidence_hash"]) if evidence else None) or row["real_evidence"]
+    return text if text and text != "N/A" else "Flagged by fact-checkers. AI is analyzing local datasets for counter-evidence..."
+
 @app.get("/fake-news")
 async def get_fake_news():
     if not os.path.exists(FAKE_DB_PATH): return {"error": "Database not found."}
@@ -133,6 +257,13 @@ async def get_fake_news():
         cursor = conn.cursor()
         cursor.execute("SELECT * FROM fake_claims ORDER BY id DESC LIMIT 50")
         rows = cursor.fetchall()
+        # real_evidence holds an excerpt; evidence_hash points at the full text in the news
+        # database, or in this database for evidence converted by migrate_bodies.py
+        evidence = {}
+        if rows and "evidence_hash" in rows[0].keys():
+            hashes = [row["evidence_hash"] for row in rows]
+            evidence = get_news_bodies(hashes)
+            evidence.update(get_bodies(conn, [h for h in hashes if h not in evidence]))
         conn.close()
 
         return [{
@@ -146,7 +277,7 @@ async def get_fake_news():
             "label": "False" if row["label"] in ["Unverifiable", "Most likely False"] else row["label"],
             "category": row["category"] or "General",
             "severity": row["impact"] or "medium",
-            "realEvidence": row["real_evidence"] if row["real_evidence"] and row["real_evidence"] != "N/A" else "Flagged by fact-checkers. AI is analyzing local datasets for counter-evidence...",
+            "realEvidence": evidence_text(row, evidence),
             "verdictScore": row["verdict_score"] or 0.45,
             "timeDetected": "Recently Debunked"
         } for row in rows]
@@ -222,23 +353,69 @@ async def get_dashboard_stats():
         conn_real.close()
         conn_fake.close()
 
-def automated_scraping():
+@app.get("/pipeline-status")
+async def get_pipeline_runs():
+    """Recent scrape → verify → index runs with per-stage progress, from the worker's job queue."""
     try:
-        scrape_all_sources(SOURCE_CONFIG)
-        scrape_politifact(pages=4)
-        scrape_bbc_disinformation()
-        verify_with_pib_checker(limit=80)
-        if checker is not None:
-            print("🔄 Syncing new articles to Vector DB...")
-            # We call the incremental sync from your main4_fast.py module
-            checker.sync_incremental(DB_PATH)
-            print("✅ Vector DB is now up-to-date with latest news.")
-        else:
-            print("⚠️ Sync skipped: Checker not initialized.") 
+        return {"worker": get_worker_status(), "jobs": get_pipeline_status()}
     except Exception as e:
-        print(f"❌ Scraper error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/index-stats")
+async def get_index_stats():
+    """Vector count, approximate memory and query latency for each time shard, newest first."""
+    if checker is None:
+        raise HTTPException(status_code=503, detail="Fact Checker model is still loading.")
+    try:
+        return {"shards": checker.shard_stats()}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is serving. Only fails if the background warm-up crashed."""
+    if startup_state["error"]:
+        raise HTTPException(status_code=503, detail=startup_state)
+    return {"status": "alive", **startup_state}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: models loaded, index synced and warm-up inference done, so /verify is fast."""
+    if not startup_state["ready"]:
+        jobs = get_pipeline_status(limit=1)
+        raise HTTPException(status_code=503, detail={**startup_state, "pipeline": jobs[0] if jobs else None,
+                                                     "pipelineWorker": get_worker_status()})
+    # A dead pipeline worker doesn't stop /verify from working, so it is reported, not failed on
+    return {"status": "ready", **startup_state, "pipelineWorker": get_worker_status()}
+
+@app.get("/worker-stats")
+async def get_worker_stats():
+    """Resident (RSS) and proportional (PSS) memory of every API and pipeline worker process."""
+    return {"workers": process_memory_report()}
+
+def refresh_index_if_stale():
+    """Reopens the vector index once after each finished pipeline run so new articles are searchable."""
+    global indexed_job_id
+    latest = last_completed_job_id()
+    if latest is not None and latest != indexed_job_id:
+        print("🔄 Pipeline run finished, reloading Vector DB...")
+        checker.reload_index()
+        indexed_job_id = latest
 
 if __name__ == "__main__":
     import uvicorn
     port = int(os.environ.get("PORT", 7860))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    if WEB_CONCURRENCY > 1 and device == "cuda":
+        # CUDA contexts don't survive fork, so pre-fork mode only works for CPU inference
+        print(f"⚠️ WEB_CONCURRENCY={WEB_CONCURRENCY} ignored: pre-fork mode is CPU only. Running one worker on CUDA.")
+        WEB_CONCURRENCY = 1
+    if WEB_CONCURRENCY > 1:
+        threads_per_worker = (os.cpu_count() or 1) // WEB_CONCURRENCY
+        # The parent, not the API workers, runs and restarts the single pipeline worker
+        sidecar = start_pipeline_worker if RUN_PIPELINE_WORKER else None
+        RUN_PIPELINE_WORKER = False
+        serve_prefork(app, "0.0.0.0", port, WEB_CONCURRENCY, preload=preload_for_prefork,
+                      on_child_start=lambda: limit_threads(threads_per_worker),
+                      sidecar=sidecar, on_sidecar_exit=record_worker_exit)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
@@ -0,0 +1,127 @@
+"""Moves full texts out of the hot tables into the compressed `bodies` table.
+
+    python migrate_bodies.py [--no-backup]
+
+news.summary and fake_claims.real_evidence are cut down to short excerpts, and the full
+texts are stored once per unique text in zlib-compressed, content-addressed rows (see
+body_store.py). Prints the file size and hot-query latency before and after. Safe to
+re-run: rows that already have a hash are skipped, and an existing backup is never
+overwritten, so it always holds the pre-migration text.
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from body_store import init_bodies, ensure_column, put_body, excerpt
+
+NEWS_DB_PATH = os.path.join(BASE_DIR, "Database", "news_articles.db")
+FAKE_DB_PATH = os.path.join(BASE_DIR, "Database", "fake_news_2.db")
+# Outside Database/ (which is copied into the image) and ignored by git and docker
+BACKUP_DIR = os.environ.get("MIGRATION_BACKUP_DIR", os.path.join(BASE_DIR, "var", "backups"))
+
+# (db path, table, text column, hash column, queries the API runs on every page load)
+TARGETS = [
+    (NEWS_DB_PATH, "news", "summary", "body_hash", [
+        "SELECT * FROM news ORDER BY scraped_at DESC LIMIT 50",
+        "SELECT id, title, source, url, scraped_at FROM news ORDER BY scraped_at DESC LIMIT 3",
+        "SELECT COUNT(*) FROM news",
+    ]),
+    (FAKE_DB_PATH, "fake_claims", "real_evidence", "evidence_hash", [
+        "SELECT * FROM fake_claims ORDER BY id DESC LIMIT 50",
+        "SELECT id, claim, content, source, verdict_score, real_evidence, url FROM fake_claims ORDER BY verdict_score DESC LIMIT 3",
+        "SELECT category, COUNT(*) as count FROM fake_claims GROUP BY category",
+    ]),
+]
+TIMING_RUNS = 20
+BATCH_SIZE = 500
+
+def db_size(path):
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+def time_queries(conn, queries):
+    """Median wall time in ms for running all hot queries once."""
+    samples = []
+    for _ in range(TIMING_RUNS):
+        started = time.perf_counter()
+        for q in queries:
+            conn.execute(q).fetchall()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def migrate_table(conn, table, text_col, hash_col):
+    ensure_column(conn, table, hash_col)
+    init_bodies(conn)
+    migrated, raw_bytes, last_id = 0, 0, 0
+    while True:
+        rows = conn.execute(
+            f"SELECT id, {text_col} FROM {table} WHERE {hash_col} IS NULL AND {text_col} IS NOT NULL "
+            f"AND {text_col} NOT IN ('', 'N/A') AND id > ? ORDER BY id LIMIT ?", (last_id, BATCH_SIZE)).fetchall()
+        if not rows:
+            break
+        for row_id, text in rows:
+            conn.execute(f"UPDATE {table} SET {text_col} = ?, {hash_col} = ? WHERE id = ?",
+                         (excerpt(text), put_body(conn, text), row_id))
+            raw_bytes += len(text.encode("utf-8"))
+            last_id = row_id
+        migrated += len(rows)
+        conn.commit()
+    return migrated, raw_bytes
+
+def backup_db(conn, path):
+    """Copies the database to BACKUP_DIR unless a backup of it already exists there."""
+    os.makedirs(BACKUP_DIR, exist_ok=True)
+    bak_path = os.path.join(BACKUP_DIR, os.path.basename(path) + ".bak")
+    if os.path.exists(bak_path):
+        print(f"⏭️ Keeping existing backup {bak_path}")
+        return
+    # SQLite's backup API also captures pages still sitting in the WAL file
+    bak = sqlite3.connect(bak_path)
+    conn.backup(bak)
+    bak.close()
+    print(f"💾 Backed up {os.path.basename(path)} to {bak_path}")
+
+def migrate_db(path, table, text_col, hash_col, queries, backup=True):
+    if not os.path.exists(path):
+        print(f"⏭️ {path} not found, skipping.")
+        return
+    conn = sqlite3.connect(path)
+    try:
+        if backup:
+            backup_db(conn, path)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size_before = db_size(path)
+        ms_before = time_queries(conn, queries)
+
+        migrated, raw_bytes = migrate_table(conn, table, text_col, hash_col)
+        unique, stored = conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM bodies").fetchone()
+        conn.execute("VACUUM")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+        size_after = db_size(path)
+        ms_after = time_queries(conn, queries)
+    except sqlite3.DatabaseError as e:
+        print(f"❌ {path}: {e}")
+        return
+    finally:
+        conn.close()
+
+    print(f"\n📊 {os.path.basename(path)} ({table}.{text_col})")
+    print(f"   Rows migrated:     {migrated} ({raw_bytes / 1e6:.2f} MB of text)")
+    print(f"   Unique bodies:     {unique} ({stored / 1e6:.2f} MB compressed)")
+    print(f"   File size:         {size_before / 1e6:.2f} MB → {size_after / 1e6:.2f} MB")
+    print(f"   Hot queries (p50): {ms_before:.2f} ms → {ms_after:.2f} ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Split article/evidence bodies into compressed storage")
+    parser.add_argument("--no-backup", action="store_true", help="don't copy each database to var/backups/<name>.bak first")
+    args = parser.parse_args()
+
+    for path, table, text_col, hash_col, queries in TARGETS:
+        migrate_db(path, table, text_col, hash_col, queries, backup=not args.no_backup)
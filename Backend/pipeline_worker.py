@@ -0,0 +1,217 @@
+"""Out-of-process scrape → verify → index pipeline.
+
+Runs as its own process (``python pipeline_worker.py``) so scraping and embedding never
+compete with live ``/verify`` traffic for the API's GIL. Runs are recorded in a small
+SQLite job queue, and the news stages are connected by bounded queues so articles are
+stored and embedded while later feeds are still being fetched.
+"""
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from News_Scraper import news_scraper_AI2 as news_scraper
+from News_Scraper import fake_news_scraper2 as fake_scraper
+from Fact_Checker.main4_fast import PIBFactChecker
+from job_queue import (StageProgress, init_jobs_db, enqueue_job, claim_next_job, finish_job,
+                       fail_interrupted_jobs, last_job_created_at, get_pipeline_status,
+                       start_startup_sync, acquire_worker_lock, register_worker, worker_heartbeat)
+
+# --- CONFIGURATION ---
+DB_PATH = os.path.join(BASE_DIR, "Database", "news_articles.db")
+
+SCRAPE_INTERVAL_HOURS = 2
+POLL_SECONDS = 15
+HEARTBEAT_SECONDS = 15
+QUEUE_MAXSIZE = 64         # bounds memory held between stages
+EXTRACT_WORKERS = news_scraper.TOTAL_MAX_WORKERS
+EMBED_BATCH_SIZE = 32
+
+_DONE = object()  # end-of-stream marker passed between stages
+
+# --- PIPELINE STAGES ---
+
+# Every stage always forwards its end-of-stream markers (even when it fails) and the last
+# stage always drains its queue, so one broken stage can't leave the others blocked.
+
+def _feed_stage(items_q, progress):
+    try:
+        for source in news_scraper.SOURCE_CONFIG:
+            items = news_scraper.fetch_feed_items(source)
+            for item in items:
+                items_q.put(item)
+            progress.bump("fetch", "feeds")
+            progress.bump("fetch", "items", len(items))
+    finally:
+        for _ in range(EXTRACT_WORKERS):
+            items_q.put(_DONE)
+
+def _extract_stage(items_q, rows_q, existing_urls, progress):
+    try:
+        while True:
+            item = items_q.get()
+            if item is _DONE:
+                return
+            name, rss_item = item
+            try:
+                res = news_scraper.process_article(name, rss_item, existing_urls)
+            except Exception:
+                res = None
+            if res == "DUPLICATE":
+                progress.bump("extract", "duplicates")
+            elif res:
+                rows_q.put(res)
+                progress.bump("extract", "articles")
+            else:
+                progress.bump("extract", "failures")
+    finally:
+        rows_q.put(_DONE)
+
+def _store_and_embed_stage(rows_q, checker, progress, errors):
+    finished_extractors = 0
+    batch = []
+    while finished_extractors < EXTRACT_WORKERS:
+        row = rows_q.get()
+        if row is _DONE:
+            finished_extractors += 1
+        else:
+            batch.append(row)
+        if batch and (len(batch) >= EMBED_BATCH_SIZE or row is _DONE):
+            try:
+                _flush_articles(batch, checker, progress)
+            except Exception as e:
+                errors.append(f"store/embed: {e}")
+                progress.bump("embed", "failed_batches")
+            batch = []
+
+def _flush_articles(batch, checker, progress):
+    news_scraper.save_articles(batch)
+    progress.bump("store", "articles", len(batch))
+    # Row layout matches process_article: (cluster_id, source, title, url, summary, image_url, scraped_at)
+    checker.index_articles([
+        {"source": r[1], "title": r[2], "url": r[3], "summary": r[4], "scraped_at": r[6]} for r in batch
+    ])
+    progress.bump("embed", "articles", len(batch))
+
+def _fact_check_scrape_stage(progress):
+    fake_scraper.init_db()
+    fake_scraper.scrape_politifact(pages=4)
+    progress.bump("claims", "politifact_runs")
+    fake_scraper.scrape_bbc_disinformation()
+    progress.bump("claims", "bbc_runs")
+
+def run_pipeline(job_id, checker):
+    """Runs one scrape → store → embed → verify pass, recording progress on ``job_id``."""
+    progress = StageProgress(job_id)
+    progress.set_stage("scrape")
+
+    news_scraper.init_db()
+    existing_urls = news_scraper.get_existing_urls()
+    items_q = queue.Queue(maxsize=QUEUE_MAXSIZE)
+    rows_q = queue.Queue(maxsize=QUEUE_MAXSIZE)
+    errors = []
+
+    def guarded(fn, *args):
+        def run():
+            try:
+                fn(*args)
+            except Exception as e:
+                errors.append(f"{fn.__name__}: {e}")
+        return threading.Thread(target=run, name=fn.__name__, daemon=True)
+
+    threads = [guarded(_feed_stage, items_q, progress)]
+    threads += [guarded(_extract_stage, items_q, rows_q, existing_urls, progress) for _ in range(EXTRACT_WORKERS)]
+    threads.append(guarded(_store_and_embed_stage, rows_q, checker, progress, errors))
+    # Fact-check sites don't depend on the RSS feeds, so they are scraped alongside them
+    threads.append(guarded(_fact_check_scrape_stage, progress))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise RuntimeError("; ".join(errors))
+
+    # Claims are verified last so they can use everything embedded above
+    progress.set_stage("verify")
+    fake_scraper.verify_with_pib_checker(limit=80, checker=checker)
+    progress.bump("verify", "runs")
+
+    progress.set_stage("retention")
+    checker.apply_retention()
+    progress.set_stage("done")
+
+# --- WORKER LOOP ---
+
+def _heartbeat_loop(pid):
+    # Separate thread so long pipeline runs still count as alive
+    while True:
+        worker_heartbeat(pid)
+        time.sleep(HEARTBEAT_SECONDS)
+
+def run_worker():
+    init_jobs_db()
+    # Exactly one worker may claim jobs and write the index. Others (a second external
+    # worker, or the supervisor of another API process) exit and are retried as standbys.
+    lock = acquire_worker_lock()
+    if lock is None:
+        print("⏭️ Another pipeline worker holds the lock; exiting.")
+        return
+    fail_interrupted_jobs()
+    register_worker(os.getpid())
+    threading.Thread(target=_heartbeat_loop, args=(os.getpid(),), name="heartbeat", daemon=True).start()
+    # Bring both schemas up to date (e.g. the split-out bodies table) before the first sync
+    news_scraper.init_db()
+    fake_scraper.init_db()
+    print("🛠️ Pipeline worker loading models...")
+    # This worker is the only process that writes to the vector index. Its startup sync is
+    # recorded as a job so API processes reload their index handles once it finishes.
+    job_id = start_startup_sync()
+    try:
+        checker = PIBFactChecker(db_path=DB_PATH)
+    except Exception as e:
+        finish_job(job_id, "failed", str(e))
+        raise
+    finish_job(job_id, "done")
+    print(f"🛠️ Pipeline worker ready (every {SCRAPE_INTERVAL_HOURS}h).")
+
+    while True:
+        last = last_job_created_at()
+        # Scheduling is derived from the job table, so restarts don't trigger an extra scrape
+        if last is None or datetime.now() - last >= timedelta(hours=SCRAPE_INTERVAL_HOURS):
+            enqueue_job("schedule")
+
+        job_id = claim_next_job()
+        if job_id is None:
+            time.sleep(POLL_SECONDS)
+            continue
+
+        print(f"🔄 Pipeline job {job_id} started.")
+        try:
+            run_pipeline(job_id, checker)
+            finish_job(job_id, "done")
+            print(f"✅ Pipeline job {job_id} complete.")
+        except Exception as e:
+            finish_job(job_id, "failed", str(e))
+            print(f"❌ Pipeline job {job_id} failed: {e}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="CrisisTruth scrape → verify → index worker")
+    parser.add_argument("--enqueue", action="store_true", help="queue a run now and exit")
+    parser.add_argument("--status", action="store_true", help="print recent runs and exit")
+    args = parser.parse_args()
+
+    if args.enqueue:
+        job_id = enqueue_job("manual")
+        print(f"✅ Queued job {job_id}." if job_id else "⏭️ A pipeline run is already queued or running.")
+    elif args.status:
+        print(json.dumps(get_pipeline_status(), indent=2, default=str))
+    else:
+        run_worker()
@@ -0,0 +1,190 @@
+"""Pre-fork multi-worker serving.
+
+The parent loads the models once, binds the listening socket and forks API workers that
+inherit the weights copy-on-write, so N workers cost little more memory than one.
+Requires ``os.fork`` (Linux/macOS) and CPU inference: CUDA contexts don't survive fork.
+"""
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+
+CHILD_POLL_SECONDS = 0.5
+
+class RestartBackoff:
+    """Exponential restart delay that resets once a process has stayed up for a while."""
+
+    def __init__(self, initial=1.0, maximum=60.0, healthy_after=60.0):
+        self.initial = initial
+        self.maximum = maximum
+        self.healthy_after = healthy_after
+        self.delay = initial
+
+    def next_delay(self, uptime: float):
+        if uptime >= self.healthy_after:
+            self.delay = self.initial
+        delay = self.delay
+        self.delay = min(self.delay * 2, self.maximum)
+        return delay
+
+def serve_prefork(app, host: str, port: int, workers: int, preload=None, on_child_start=None,
+                  sidecar=None, on_sidecar_exit=None):
+    """Runs ``workers`` uvicorn servers sharing one socket, restarting any that crash.
+
+    ``preload`` runs once in the parent before forking; ``on_child_start`` runs in each worker.
+    ``sidecar`` starts a helper subprocess (returns a Popen) that the parent also keeps
+    running; ``on_sidecar_exit(pid, returncode)`` is called each time it exits.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Pre-fork mode needs os.fork; set WEB_CONCURRENCY=1 on this platform.")
+    # Imported here so the memory report and RestartBackoff don't need the server installed
+    import uvicorn
+
+    if preload is not None:
+        preload()
+
+    # A CUDA context created in the parent is unusable after fork: every worker would die on
+    # its first CUDA call and be restarted over and over
+    torch = sys.modules.get("torch")
+    if torch is not None and torch.cuda.is_available() and torch.cuda.is_initialized():
+        raise RuntimeError("Pre-fork mode is CPU only: CUDA was initialized before forking. "
+                           "Set WEB_CONCURRENCY=1 when running on a GPU.")
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    os.environ["PREFORK_PARENT_PID"] = str(os.getpid())
+
+    # Move everything loaded so far out of the GC's reach: collections in the workers would
+    # otherwise write to those objects' headers and un-share their pages
+    gc.freeze()
+
+    def spawn():
+        pid = os.fork()
+        if pid:
+            return pid
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        if on_child_start is not None:
+            on_child_start()
+        server = uvicorn.Server(uvicorn.Config(app, host=host, port=port))
+        server.run(sockets=[sock])
+        os._exit(0)
+
+    children = {spawn(): time.monotonic() for _ in range(workers)}  # pid -> start time
+    pending_restarts = []  # monotonic times at which to fork a replacement worker
+    worker_backoff = RestartBackoff()
+    print(f"🚀 Pre-forked {workers} API workers on {host}:{port} (parent pid {os.getpid()})")
+
+    side = sidecar() if sidecar is not None else None
+    side_started, side_restart_at = time.monotonic(), None
+    side_backoff = RestartBackoff()
+
+    stopping = False
+
+    def shutdown(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # Poll our own children by pid rather than os.wait(), which would also reap the
+    # sidecar and hide its exit from its Popen
+    while children or (pending_restarts and not stopping):
+        for pid in list(children):
+            try:
+                done, status = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                done, status = pid, None
+            if not done:
+                continue
+            started = children.pop(pid)
+            if not stopping:
+                delay = worker_backoff.next_delay(time.monotonic() - started)
+                print(f"⚠️ API worker {pid} exited ({status}); restarting in {delay:.0f}s...")
+                pending_restarts.append(time.monotonic() + delay)
+
+        if not stopping:
+            due = [t for t in pending_restarts if t <= time.monotonic()]
+            for t in due:
+                pending_restarts.remove(t)
+                children[spawn()] = time.monotonic()
+
+        if side is not None and not stopping:
+            if side_restart_at is None and side.poll() is not None:
+                if on_sidecar_exit is not None:
+                    on_sidecar_exit(side.pid, side.returncode)
+                delay = side_backoff.next_delay(time.monotonic() - side_started)
+                print(f"⚠️ Sidecar {side.pid} exited ({side.returncode}); restarting in {delay:.0f}s...")
+                side_restart_at = time.monotonic() + delay
+            elif side_restart_at is not None and time.monotonic() >= side_restart_at:
+                side, side_started, side_restart_at = sidecar(), time.monotonic(), None
+
+        time.sleep(CHILD_POLL_SECONDS)
+
+    if side is not None and side.poll() is None:
+        side.terminate()
+        side.wait(timeout=30)
+    sock.close()
+
+def _read_kb(path: str, field: str):
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def _children_of(pid: int):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(p) for p in f.read().split()]
+    except OSError:
+        return []
+
+def _role(pid: int):
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            cmdline = f.read()
+    except OSError:
+        return "unknown"
+    return "pipeline-worker" if b"pipeline_worker.py" in cmdline else "api"
+
+def process_memory_report():
+    """RSS and PSS (proportional share, which splits copy-on-write pages between their users)
+    for this process, its pre-fork parent and sibling workers. Linux only; empty elsewhere."""
+    if not os.path.exists("/proc/self/status"):
+        return []
+    me, parent = os.getpid(), os.getppid()
+    forked = os.environ.get("PREFORK_PARENT_PID") == str(parent)
+    if forked:
+        pids = [parent] + _children_of(parent)  # pre-fork worker: report the whole family
+    else:
+        pids = [me] + _children_of(me)          # single process: itself and its pipeline worker
+
+    report = []
+    for pid in pids:
+        rss = _read_kb(f"/proc/{pid}/status", "VmRSS")
+        if rss is None:
+            continue
+        pss = _read_kb(f"/proc/{pid}/smaps_rollup", "Pss")
+        report.append({
+            "pid": pid,
+            "role": "prefork-parent" if forked and pid == parent else _role(pid),
+            "self": pid == me,
+            "rssMB": round(rss / 1024, 1),
+            "pssMB": round(pss / 1024, 1) if pss is not None else None,
+        })
+    return report
@@ -0,0 +1,81 @@
+"""On-disk format of portable vector index snapshots (see index_snapshot.py).
+
+A snapshot is one .npz file of columns: ids, float vectors, and documents/sources/dates/body
+hashes packed as UTF-8 blobs with offsets (no pickled objects). A JSON manifest carries the
+embedding model and its exact revision, sync watermark and a SHA-256 over all columns.
+Needs only numpy, so snapshots can be written, read and checked without the models.
+"""
+import hashlib
+import json
+from datetime import datetime
+
+import numpy as np
+
+SNAPSHOT_FORMAT = 3
+SNAPSHOT_COLUMNS = ["ids", "ids_offsets", "vectors", "documents", "documents_offsets",
+                    "sources", "sources_offsets", "dates", "dates_offsets", "body_hashes", "body_hashes_offsets"]
+
+def _pack_strings(values):
+    encoded = [str(v).encode("utf-8") for v in values]
+    offsets = np.cumsum([0] + [len(b) for b in encoded], dtype=np.int64)
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+def _unpack_strings(data, offsets):
+    raw = data.tobytes()
+    return [raw[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+def _columns_checksum(columns):
+    digest = hashlib.sha256()
+    for key in SNAPSHOT_COLUMNS:
+        digest.update(np.ascontiguousarray(columns[key]).tobytes())
+    return digest.hexdigest()
+
+def write_snapshot(out_path: str, ids, vectors, documents, metadatas, manifest: dict, half: bool = False):
+    """Writes records to ``out_path``. ``manifest`` names the embedding model; the format,
+    sizes, watermark and checksum are added here. Returns the full manifest."""
+    columns = {"vectors": np.asarray(vectors, dtype=np.float16 if half else np.float32)}
+    columns["ids"], columns["ids_offsets"] = _pack_strings(ids)
+    columns["documents"], columns["documents_offsets"] = _pack_strings(documents)
+    columns["sources"], columns["sources_offsets"] = _pack_strings(m.get("source", "") for m in metadatas)
+    dates = [str(m.get("date", "")) for m in metadatas]
+    columns["dates"], columns["dates_offsets"] = _pack_strings(dates)
+    columns["body_hashes"], columns["body_hashes_offsets"] = _pack_strings(m.get("body_hash", "") for m in metadatas)
+
+    manifest = {
+        "format": SNAPSHOT_FORMAT,
+        **manifest,
+        "embeddingDim": int(columns["vectors"].shape[1]),
+        "dtype": str(columns["vectors"].dtype),
+        "count": len(ids),
+        # Newest article in the snapshot; anything scraped later is the delta to embed
+        "watermark": max(dates),
+        "createdAt": datetime.now().isoformat(),
+        "sha256": _columns_checksum(columns),
+    }
+    columns["manifest"] = np.frombuffer(json.dumps(manifest).encode("utf-8"), dtype=np.uint8)
+    with open(out_path, "wb") as f:
+        np.savez_compressed(f, **columns)
+    return manifest
+
+def read_snapshot(path: str, embedding_model: str):
+    """Loads and validates a snapshot. Raises ValueError if the checksum doesn't match or it
+    wasn't embedded with ``embedding_model``."""
+    with np.load(path, allow_pickle=False) as npz:
+        columns = {key: npz[key] for key in npz.files}
+    manifest = json.loads(columns.pop("manifest").tobytes().decode("utf-8"))
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"Unsupported snapshot format {manifest.get('format')}")
+    if _columns_checksum(columns) != manifest["sha256"]:
+        raise ValueError("Snapshot checksum mismatch")
+    if manifest["embeddingModel"] != embedding_model:
+        raise ValueError(f"Snapshot was embedded with {manifest['embeddingModel']}, not {embedding_model}")
+
+    sources = _unpack_strings(columns["sources"], columns["sources_offsets"])
+    dates = _unpack_strings(columns["dates"], columns["dates_offsets"])
+    hashes = _unpack_strings(columns["body_hashes"], columns["body_hashes_offsets"])
+    return manifest, {
+        "ids": _unpack_strings(columns["ids"], columns["ids_offsets"]),
+        "embeddings": columns["vectors"].astype(np.float32),
+        "documents": _unpack_strings(columns["documents"], columns["documents_offsets"]),
+        "metadatas": [{"source": src, "date": date, "body_hash": h} for src, date, h in zip(sources, dates, hashes)],
+    }
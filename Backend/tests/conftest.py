@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+import job_queue
+
+@pytest.fixture
+def jobs_db(tmp_path, monkeypatch):
+    """Points the job queue at a fresh database for each test."""
+    monkeypatch.setattr(job_queue, "JOBS_DB_PATH", str(tmp_path / "pipeline_jobs.db"))
+    job_queue.init_jobs_db()
+    return job_queue
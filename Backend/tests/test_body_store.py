@@ -0,0 +1,80 @@
+import sqlite3
+
+import pytest
+
+import body_store
+import migrate_bodies
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "news.db"))
+    body_store.init_bodies(conn)
+    yield conn
+    conn.close()
+
+def test_put_and_get_body_round_trip(conn):
+    text = "Relief camps opened after floods. ünïcode ✓ " * 50
+    digest = body_store.put_body(conn, text)
+    assert digest == body_store.body_hash(text)
+    assert body_store.get_bodies(conn, [digest]) == {digest: text}
+
+    size, stored = conn.execute("SELECT size, LENGTH(data) FROM bodies").fetchone()
+    assert size == len(text.encode("utf-8"))
+    assert stored < size  # compressed
+
+def test_identical_bodies_are_stored_once(conn):
+    first = body_store.put_body(conn, "same text")
+    second = body_store.put_body(conn, "same text")
+    other = body_store.put_body(conn, "other text")
+    assert first == second != other
+    assert conn.execute("SELECT COUNT(*) FROM bodies").fetchone()[0] == 2
+
+def test_empty_bodies_and_missing_hashes(conn):
+    assert body_store.put_body(conn, "") is None
+    assert body_store.put_body(conn, None) is None
+    digest = body_store.put_body(conn, "kept")
+    assert body_store.get_bodies(conn, [digest, "missing", None]) == {digest: "kept"}
+
+def test_ensure_column_is_idempotent(conn):
+    conn.execute("CREATE TABLE news (id INTEGER PRIMARY KEY, summary TEXT)")
+    body_store.ensure_column(conn, "news", "body_hash")
+    body_store.ensure_column(conn, "news", "body_hash")
+    assert body_store.has_column(conn, "news", "body_hash")
+
+def test_migrate_table_moves_text_and_is_idempotent(conn):
+    long_text = "x" * 1000
+    conn.execute("CREATE TABLE news (id INTEGER PRIMARY KEY, summary TEXT)")
+    conn.executemany("INSERT INTO news (summary) VALUES (?)",
+                     [(long_text,), (long_text,), ("short",), ("",), ("N/A",), (None,)])
+    conn.commit()
+
+    migrated, raw_bytes = migrate_bodies.migrate_table(conn, "news", "summary", "body_hash")
+    assert migrated == 3
+    assert raw_bytes == 2 * 1000 + len("short")
+    # Duplicate texts share one body
+    assert conn.execute("SELECT COUNT(*) FROM bodies").fetchone()[0] == 2
+
+    rows = conn.execute("SELECT summary, body_hash FROM news ORDER BY id").fetchall()
+    assert rows[0] == (body_store.excerpt(long_text), body_store.body_hash(long_text))
+    assert rows[1][1] == rows[0][1]
+    assert rows[3:] == [("", None), ("N/A", None), (None, None)]
+    assert body_store.get_bodies(conn, [rows[0][1]]) == {rows[0][1]: long_text}
+
+    # A second run finds nothing left to do and leaves the data alone
+    assert migrate_bodies.migrate_table(conn, "news", "summary", "body_hash") == (0, 0)
+    assert conn.execute("SELECT summary, body_hash FROM news ORDER BY id").fetchall() == rows
+
+def test_backup_is_never_overwritten(conn, tmp_path, monkeypatch):
+    monkeypatch.setattr(migrate_bodies, "BACKUP_DIR", str(tmp_path / "backups"))
+    path = str(tmp_path / "news.db")
+    conn.execute("CREATE TABLE news (id INTEGER PRIMARY KEY, summary TEXT)")
+    conn.execute("INSERT INTO news (summary) VALUES (?)", ("x" * 1000,))
+    conn.commit()
+
+    migrate_bodies.backup_db(conn, path)
+    migrate_bodies.migrate_table(conn, "news", "summary", "body_hash")
+    migrate_bodies.backup_db(conn, path)  # re-run after migrating
+
+    bak = sqlite3.connect(str(tmp_path / "backups" / "news.db.bak"))
+    assert bak.execute("SELECT summary FROM news").fetchone()[0] == "x" * 1000
+    bak.close()
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import index_shards
+from index_shards import apply_retention, monthly_shard_name, shard_window, weekly_shard_name
+
+class FakeShard:
+    def __init__(self):
+        self.records = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for i, emb, doc, meta in zip(ids, embeddings, documents, metadatas):
+            self.records[i] = (emb, doc, meta)
+
+    def get(self, include=None):
+        ids = list(self.records)
+        return {
+            "ids": ids,
+            "embeddings": [self.records[i][0] for i in ids],
+            "documents": [self.records[i][1] for i in ids],
+            "metadatas": [self.records[i][2] for i in ids],
+        }
+
+class FakeClient:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_collection(self, name):
+        self.deleted.append(name)
+
+def make_index(records):
+    """Shards {name: FakeShard} filled with (id, date) records placed by week."""
+    shards = {}
+    get_shard = lambda name: shards.setdefault(name, FakeShard())
+    index_shards.add_to_shards(get_shard, [r[0] for r in records], [[0.0]] * len(records),
+                               [r[0] for r in records], [{"date": r[1]} for r in records])
+    return shards, get_shard
+
+def test_shard_window_weekly():
+    start, end = shard_window("news_w_2025_01")
+    # ISO week 1 of 2025 starts on Monday 30 December 2024
+    assert start == datetime(2024, 12, 30)
+    assert end - start == timedelta(weeks=1)
+    assert weekly_shard_name(datetime(2024, 12, 31)) == "news_w_2025_01"
+
+def test_shard_window_month_rollover():
+    assert shard_window("news_m_2024_12") == (datetime(2024, 12, 1), datetime(2025, 1, 1))
+    assert shard_window("news_m_2025_01") == (datetime(2025, 1, 1), datetime(2025, 2, 1))
+    assert monthly_shard_name(datetime(2025, 1, 31)) == "news_m_2025_01"
+
+def test_shard_window_rejects_other_collections():
+    assert shard_window("news_facts") is None
+    assert shard_window("news_w_bad") is None
+
+def test_compaction_splits_week_by_article_date():
+    # Week 2025_01 runs from 30 December 2024 to 5 January 2025
+    shards, get_shard = make_index([
+        ("dec", "2024-12-31 10:00:00"),
+        ("jan", "2025-01-02 10:00:00"),
+    ])
+    assert list(shards) == ["news_w_2025_01"]
+
+    client = FakeClient()
+    apply_retention(client, shards, get_shard, now=datetime(2025, 4, 1))
+
+    assert client.deleted == ["news_w_2025_01"]
+    assert set(shards["news_m_2024_12"].records) == {"dec"}
+    assert set(shards["news_m_2025_01"].records) == {"jan"}
+
+def test_compaction_places_undated_articles_in_week_start_month():
+    shards, get_shard = make_index([("dated", "2024-12-31 10:00:00")])
+    shards["news_w_2025_01"].upsert(["undated"], [[0.0]], ["undated"], [{"date": "unknown"}])
+
+    apply_retention(FakeClient(), shards, get_shard, now=datetime(2025, 4, 1))
+    assert set(shards["news_m_2024_12"].records) == {"dated", "undated"}
+
+def test_retention_drops_expired_and_keeps_recent_shards():
+    now = datetime(2025, 6, 2)
+    shards, get_shard = make_index([
+        ("old", "2024-10-01 10:00:00"),
+        ("recent", "2025-05-28 10:00:00"),
+    ])
+    client = FakeClient()
+    apply_retention(client, shards, get_shard, now=now)
+
+    assert "news_w_2024_40" in client.deleted
+    assert list(shards) == [weekly_shard_name(datetime(2025, 5, 28))]
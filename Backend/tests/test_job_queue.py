@@ -0,0 +1,137 @@
+def test_only_one_job_can_be_active(jobs_db):
+    first = jobs_db.enqueue_job("manual")
+    assert first is not None
+    assert jobs_db.enqueue_job("schedule") is None
+
+    assert jobs_db.claim_next_job() == first
+    assert jobs_db.enqueue_job("schedule") is None
+
+    jobs_db.finish_job(first, "done")
+    assert jobs_db.enqueue_job("schedule") is not None
+
+def test_restarted_worker_fails_job_left_running(jobs_db):
+    # A worker claims a job, then is terminated before finishing it
+    job_id = jobs_db.enqueue_job("schedule")
+    assert jobs_db.claim_next_job() == job_id
+
+    # Worker startup: the interrupted job is failed straight away, however recent it is
+    assert jobs_db.fail_interrupted_jobs() == 1
+    status = jobs_db.get_pipeline_status(limit=1)[0]
+    assert status["id"] == job_id
+    assert status["status"] == "failed"
+    assert "interrupted" in status["error"]
+
+    # ...so the queue accepts new runs again
+    sync_id = jobs_db.enqueue_job("startup-sync")
+    assert sync_id is not None
+    assert jobs_db.claim_next_job() == sync_id
+
+def test_fail_interrupted_jobs_leaves_queued_and_finished_jobs(jobs_db):
+    done = jobs_db.enqueue_job("manual")
+    jobs_db.claim_next_job()
+    jobs_db.finish_job(done, "done")
+    queued = jobs_db.enqueue_job("schedule")
+
+    assert jobs_db.fail_interrupted_jobs() == 0
+    statuses = {j["id"]: j["status"] for j in jobs_db.get_pipeline_status()}
+    assert statuses == {done: "done", queued: "queued"}
+    assert jobs_db.last_completed_job_id() == done
+
+def test_startup_sync_does_not_count_towards_schedule(jobs_db):
+    sync_id = jobs_db.enqueue_job("startup-sync")
+    jobs_db.claim_next_job()
+    jobs_db.finish_job(sync_id, "done")
+    assert jobs_db.last_job_created_at() is None
+
+def test_worker_status_reports_exit_and_restart(jobs_db):
+    assert jobs_db.get_worker_status() is None
+
+    jobs_db.register_worker(1234)
+    status = jobs_db.get_worker_status()
+    assert status["pid"] == 1234 and status["alive"]
+
+    jobs_db.record_worker_exit(1234, -9)
+    status = jobs_db.get_worker_status()
+    assert not status["alive"]
+    assert status["exitCode"] == -9 and status["exits"] == 1
+
+    # The restarted worker registers itself; the exit count is kept
+    jobs_db.register_worker(5678)
+    status = jobs_db.get_worker_status()
+    assert status["pid"] == 5678 and status["alive"]
+    assert status["exitedAt"] is None and status["exits"] == 1
+
+def test_worker_without_heartbeat_is_not_alive(jobs_db, monkeypatch):
+    jobs_db.register_worker(1234)
+    monkeypatch.setattr(jobs_db, "WORKER_HEARTBEAT_TIMEOUT", 0)
+    assert not jobs_db.get_worker_status()["alive"]
+
+def test_startup_sync_failure(jobs_db):
+    from datetime import datetime, timedelta
+    started = datetime.now()
+    assert jobs_db.startup_sync_failure(started) is None
+
+    sync_id = jobs_db.enqueue_job("startup-sync")
+    jobs_db.claim_next_job()
+    assert jobs_db.startup_sync_failure(started) is None  # still running
+
+    jobs_db.finish_job(sync_id, "failed", "database is locked")
+    assert "database is locked" in jobs_db.startup_sync_failure(started)
+    # A failure from before this process started is someone else's problem
+    assert jobs_db.startup_sync_failure(datetime.now() + timedelta(seconds=1)) is None
+
+def test_startup_sync_failure_when_worker_exits(jobs_db):
+    from datetime import datetime
+    started = datetime.now()
+    jobs_db.register_worker(1234)
+    assert jobs_db.startup_sync_failure(started) is None
+    jobs_db.record_worker_exit(1234, 1)
+    assert "exited with code 1" in jobs_db.startup_sync_failure(started)
+
+def test_only_one_worker_holds_the_lock(jobs_db):
+    first = jobs_db.acquire_worker_lock()
+    assert first is not None
+    assert jobs_db.acquire_worker_lock() is None
+
+    first.close()  # the holder exits
+    second = jobs_db.acquire_worker_lock()
+    assert second is not None
+    second.close()
+
+def test_standby_exit_does_not_mark_live_worker_dead(jobs_db):
+    jobs_db.register_worker(1234)
+    # A second worker lost the lock and exited; the registered worker is still heartbeating
+    jobs_db.record_worker_exit(5678, 0)
+    status = jobs_db.get_worker_status()
+    assert status["pid"] == 1234 and status["alive"] and status["exits"] == 0
+
+def test_startup_sync_is_recorded_behind_a_queued_run(jobs_db):
+    # A run queued by --enqueue, or left queued by a killed worker
+    queued = jobs_db.enqueue_job("manual")
+    sync_id = jobs_db.start_startup_sync()
+    assert sync_id is not None
+    jobs_db.finish_job(sync_id, "done")
+    assert jobs_db.last_completed_job_id() == sync_id
+
+    # The queued run is still picked up afterwards
+    assert jobs_db.claim_next_job() == queued
+
+def test_readiness_needs_the_current_workers_sync(jobs_db):
+    # A finished sync from an earlier worker (or a copied jobs DB) doesn't count
+    old_sync = jobs_db.start_startup_sync()
+    jobs_db.finish_job(old_sync, "done")
+    assert not jobs_db.current_worker_synced()
+
+    jobs_db.register_worker(1234)
+    assert not jobs_db.current_worker_synced()
+
+    sync_id = jobs_db.start_startup_sync()
+    assert not jobs_db.current_worker_synced()  # still running
+    jobs_db.finish_job(sync_id, "done")
+    assert jobs_db.current_worker_synced()
+
+def test_readiness_ignores_sync_of_dead_worker(jobs_db, monkeypatch):
+    jobs_db.register_worker(1234)
+    jobs_db.finish_job(jobs_db.start_startup_sync(), "done")
+    monkeypatch.setattr(jobs_db, "WORKER_HEARTBEAT_TIMEOUT", 0)
+    assert not jobs_db.current_worker_synced()
@@ -0,0 +1,15 @@
+from prefork import RestartBackoff
+
+def test_restart_delay_doubles_up_to_maximum():
+    backoff = RestartBackoff(initial=1.0, maximum=8.0, healthy_after=60.0)
+    # A process that keeps crashing right after start
+    assert [backoff.next_delay(0.5) for _ in range(6)] == [1.0, 2.0, 4.0, 8.0, 8.0, 8.0]
+
+def test_restart_delay_resets_after_healthy_run():
+    backoff = RestartBackoff(initial=1.0, maximum=60.0, healthy_after=60.0)
+    for _ in range(4):
+        backoff.next_delay(1.0)
+    assert backoff.next_delay(59.0) == 16.0
+    # Stayed up long enough: the next crash is treated as a fresh one
+    assert backoff.next_delay(60.0) == 1.0
+    assert backoff.next_delay(1.0) == 2.0
@@ -0,0 +1,80 @@
+import json
+
+import numpy as np
+import pytest
+
+from snapshot_format import _pack_strings, _unpack_strings, read_snapshot, write_snapshot
+
+MODEL = "all-MiniLM-L6-v2"
+
+def write_example(path, half=False):
+    return write_snapshot(
+        str(path),
+        ids=["a", "b"],
+        vectors=[[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]],
+        documents=["Flood relief | Relief camps opened", "Café reopens | ünïcode body"],
+        metadatas=[
+            {"source": "The Hindu", "date": "2025-01-02 10:00:00", "body_hash": "h1"},
+            {"source": "BBC", "date": "2025-01-03 09:00:00"},
+        ],
+        manifest={"embeddingModel": MODEL, "embeddingModelRevision": "abc123"},
+        half=half,
+    )
+
+def test_pack_strings_round_trip():
+    values = ["", "plain", "ünïcode ✓", "line\nbreak"]
+    data, offsets = _pack_strings(values)
+    assert data.dtype == np.uint8 and offsets.dtype == np.int64
+    assert _unpack_strings(data, offsets) == values
+
+def test_snapshot_round_trip(tmp_path):
+    path = tmp_path / "snap.npz"
+    written = write_example(path)
+    assert written["count"] == 2 and written["embeddingDim"] == 3
+    assert written["watermark"] == "2025-01-03 09:00:00"
+
+    manifest, data = read_snapshot(str(path), MODEL)
+    assert manifest == written
+    assert data["ids"] == ["a", "b"]
+    assert data["documents"][1] == "Café reopens | ünïcode body"
+    assert data["metadatas"][0] == {"source": "The Hindu", "date": "2025-01-02 10:00:00", "body_hash": "h1"}
+    assert data["metadatas"][1]["body_hash"] == ""
+    np.testing.assert_allclose(data["embeddings"], [[0.1, 0.2, 0.3], [0.4, 0.5, 0.6]], rtol=1e-6)
+
+def test_half_precision_vectors_load_as_float32(tmp_path):
+    path = tmp_path / "snap.npz"
+    assert write_example(path, half=True)["dtype"] == "float16"
+    _, data = read_snapshot(str(path), MODEL)
+    assert data["embeddings"].dtype == np.float32
+
+def test_tampered_snapshot_is_rejected(tmp_path):
+    path = tmp_path / "snap.npz"
+    write_example(path)
+    with np.load(path, allow_pickle=False) as npz:
+        columns = {key: npz[key] for key in npz.files}
+    columns["vectors"] = columns["vectors"] + 1
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **columns)
+
+    with pytest.raises(ValueError, match="checksum"):
+        read_snapshot(str(path), MODEL)
+
+def test_snapshot_from_other_model_is_rejected(tmp_path):
+    path = tmp_path / "snap.npz"
+    write_example(path)
+    with pytest.raises(ValueError, match=MODEL):
+        read_snapshot(str(path), "other-model")
+
+def test_older_format_is_rejected(tmp_path):
+    path = tmp_path / "snap.npz"
+    write_example(path)
+    with np.load(path, allow_pickle=False) as npz:
+        columns = {key: npz[key] for key in npz.files}
+    manifest = json.loads(columns["manifest"].tobytes().decode("utf-8"))
+    manifest["format"] = 2
+    columns["manifest"] = np.frombuffer(json.dumps(manifest).encode("utf-8"), dtype=np.uint8)
+    with open(path, "wb") as f:
+        np.savez_compressed(f, **columns)
+
+    with pytest.raises(ValueError, match="format"):
+        read_snapshot(str(path), MODEL)